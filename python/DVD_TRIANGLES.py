@@ -1,8 +1,12 @@
-import glfw
-from OpenGL.GL import *
 import numpy as np
-import random
+from renderer import App, Scene, ShaderProgram, Mesh, VertexFormat, interpolate
+from OpenGL.GL import *
 
+TRIANGLE_COUNT = 10
+
+# Screen-space x, y as normalized shorts, z is left to default to 0:
+# 4 bytes streamed per vertex instead of 12
+POSITION_FORMAT = VertexFormat((2, np.int16, True))
 
 
 
@@ -27,109 +31,63 @@ void main()
 """
 
 
-glfw.init()
-window = glfw.create_window(900, 600, "DVD TRIANGLES", None, None)
-glfw.make_context_current(window)
-
-
-def compile_shader(source, shader_type):
-    shader = glCreateShader(shader_type)
-    glShaderSource(shader, source)
-    glCompileShader(shader)
-    if glGetShaderiv(shader, GL_COMPILE_STATUS) != GL_TRUE:
-        raise RuntimeError(glGetShaderInfoLog(shader))
-    return shader
-
-vertex_shader = compile_shader(VERTEX_SHADER_SOURCE, GL_VERTEX_SHADER)
-fragment_shader = compile_shader(FRAGMENT_SHADER_SOURCE, GL_FRAGMENT_SHADER)
-
-shader_program = glCreateProgram()
-
-glAttachShader(shader_program, vertex_shader)
-glAttachShader(shader_program, fragment_shader)
-
-glLinkProgram(shader_program)
-
-glDeleteShader(vertex_shader)
-glDeleteShader(fragment_shader)
-
-
-vertex = []
-velocities = []
-
-for i in range(10):
-    x = random.uniform(-0.8, 0.8)
-    y = random.uniform(-0.8, 0.8)
-    z = 0.0
-
-    vertex.extend([x+0.0, y+0.1, z])
-    vertex.extend([x-0.1, y-0.1, z])
-    vertex.extend([x+0.1, y-0.1, z])
-
-    dx = random.uniform(-0.01, 0.01)
-    dy = random.uniform(-0.01, 0.01)
-    velocities.append([dx, dy])
-
-vertices = np.array(vertex, dtype=np.float32)
+def move_triangles(vertices, velocities, step):
+    # One strided view per vertex and axis, so every op is a single long loop
+    for axis in range(2):
+        velocity = velocities[axis] * np.float32(step)
 
-VBO = glGenBuffers(1)
-VAO = glGenVertexArrays(1)
+        # Bounce if any vertex of the triangle would leave the screen
+        bounce = np.abs(vertices[:, 0, axis] + velocity) > 1.0
+        bounce |= np.abs(vertices[:, 1, axis] + velocity) > 1.0
+        bounce |= np.abs(vertices[:, 2, axis] + velocity) > 1.0
+        np.negative(velocity, out=velocity, where=bounce)
+        np.negative(velocities[axis], out=velocities[axis], where=bounce)
 
-glBindVertexArray(VAO)
-glBindBuffer(GL_ARRAY_BUFFER, VBO)
-glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
+        for corner in range(3):
+            vertices[:, corner, axis] += velocity
 
-glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 3 * vertices.itemsize, ctypes.c_void_p(0))
-glEnableVertexAttribArray(0)
 
-glBindBuffer(GL_ARRAY_BUFFER, 0)
-glBindVertexArray(0)
+class DvdScene(Scene):
+    def __init__(self, app, triangle_count=TRIANGLE_COUNT, seed=None):
+        super().__init__(app)
 
+        self.shader_program = ShaderProgram(VERTEX_SHADER_SOURCE, FRAGMENT_SHADER_SOURCE)
 
-while not glfw.window_should_close(window):
-    glfw.poll_events()
+        rng = np.random.default_rng(seed)
 
-    glClearColor(0.1, 0.1, 0.1, 1.0)
-    glClear(GL_COLOR_BUFFER_BIT)
+        # 3 vertices per triangle, x, y each
+        self.vertices = np.zeros((triangle_count, 3, 2), dtype=np.float32)
+        self.vertices[:] = rng.uniform(-0.8, 0.8, (triangle_count, 1, 2)) + [[0.0, 0.1], [-0.1, -0.1], [0.1, -0.1]]
 
+        # dx row and dy row per second, one column per triangle
+        self.velocities = rng.uniform(-0.6, 0.6, (2, triangle_count)).astype(np.float32)
 
-    for i in range(0, len(vertices), 9):  # 3 vertices per triangle, 3 floats per vertex
-        dx, dy = velocities[i // 9]
+        # State as of the tick before, drawn blended towards the latest
+        self.previous = self.vertices.copy()
+        self.blended = np.empty_like(self.vertices)
 
-        # Check for bouncing (any vertex hitting screen border)
-        bounce_x = False
-        bounce_y = False
-        for j in range(3):  # check all 3 vertices
-            vx = vertices[i + j * 3 + 0]
-            vy = vertices[i + j * 3 + 1]
-            if vx + dx > 1.0 or vx + dx < -1.0:
-                bounce_x = True
-            if vy + dy > 1.0 or vy + dy < -1.0:
-                bounce_y = True
+        # Streamed every frame
+        self.packed = POSITION_FORMAT.pack(self.vertices)
+        self.mesh = Mesh(self.packed, POSITION_FORMAT, usage=GL_STREAM_DRAW)
 
-        if bounce_x:
-            velocities[i // 9][0] *= -1
-        if bounce_y:
-            velocities[i // 9][1] *= -1
+    def tick(self, step):
+        self.previous[:] = self.vertices
+        move_triangles(self.vertices, self.velocities, step)
 
-        dx, dy = velocities[i // 9]
-        for j in range(3):
-            vertices[i + j * 3 + 0] += dx
-            vertices[i + j * 3 + 1] += dy
+    def draw(self, renderer):
+        renderer.clear(0.1, 0.1, 0.1)
 
-    glBindBuffer(GL_ARRAY_BUFFER, VBO)
-    glBufferSubData(GL_ARRAY_BUFFER, 0, vertices.nbytes, vertices)
-    glBindBuffer(GL_ARRAY_BUFFER, 0)
+        with self.app.profiler.phase("upload"):
+            interpolate(self.previous, self.vertices, self.app.timestep.alpha, self.blended)
+            self.mesh.update(POSITION_FORMAT.pack(self.blended, out=self.packed))
 
-    glUseProgram(shader_program)
+        self.shader_program.use()
+        renderer.draw(self.mesh)
 
-    glBindVertexArray(VAO)
-    glDrawArrays(GL_TRIANGLES, 0, len(vertices))
+    def delete(self):
+        self.mesh.delete()
+        self.shader_program.delete()
 
-    # glfw.swap_interval(0)
-    glfw.swap_buffers(window)
 
-glDeleteVertexArrays(1, [VAO])
-glDeleteBuffers(1, [VBO])
-glDeleteProgram(shader_program)
-glfw.terminate()
\ No newline at end of file
+if __name__ == "__main__":
+    App(900, 600, "DVD TRIANGLES", show_fps=True).run(DvdScene)
\ No newline at end of file
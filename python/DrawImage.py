@@ -1,8 +1,9 @@
-import glfw
-from OpenGL.GL import *
 import numpy as np
-from PIL import Image
-import ctypes
+from renderer import App, Scene, ShaderProgram, Mesh, CompressedTexture, TextureManager, VertexFormat
+
+# dirt.dds is the same image as BC1 with its mipmaps
+IMAGE_PATH = "dirt.png"
+COMPRESSED_EXTENSIONS = (".dds", ".ktx2")
 
 # Vertex and fragment shaders with texture support
 VERTEX_SHADER_SOURCE = """
@@ -19,6 +20,9 @@ void main()
 }
 """
 
+# Float positions, texture coordinates as normalized shorts
+VERTEX_FORMAT = VertexFormat((3, np.float32), (2, np.uint16, True))
+
 FRAGMENT_SHADER_SOURCE = """
 #version 330 core
 out vec4 FragColor;
@@ -32,100 +36,71 @@ void main()
 }
 """
 
-# Initialize GLFW and create window
-glfw.init()
-window = glfw.create_window(800, 600, "Dirt Texture", None, None)
-glfw.make_context_current(window)
-
-# Compile shaders
-def compile_shader(source, shader_type):
-    shader = glCreateShader(shader_type)
-    glShaderSource(shader, source)
-    glCompileShader(shader)
-    if not glGetShaderiv(shader, GL_COMPILE_STATUS):
-        raise RuntimeError(glGetShaderInfoLog(shader).decode())
-    return shader
-
-vertex_shader = compile_shader(VERTEX_SHADER_SOURCE, GL_VERTEX_SHADER)
-fragment_shader = compile_shader(FRAGMENT_SHADER_SOURCE, GL_FRAGMENT_SHADER)
-
-shader_program = glCreateProgram()
-glAttachShader(shader_program, vertex_shader)
-glAttachShader(shader_program, fragment_shader)
-glLinkProgram(shader_program)
-
-# Clean up shaders
-glDeleteShader(vertex_shader)
-glDeleteShader(fragment_shader)
-
-# Quad (two triangles) with texture coordinates
-vertices = np.array([
-    # positions        # tex coords
-     0.5,  0.5, 0.0,   1.0, 1.0,
-     0.5, -0.5, 0.0,   1.0, 0.0,
-    -0.5, -0.5, 0.0,   0.0, 0.0,
-    -0.5,  0.5, 0.0,   0.0, 1.0
-], dtype=np.float32)
-
-indices = np.array([
-    0, 1, 3,
-    1, 2, 3
-], dtype=np.uint32)
-
-# VAO, VBO, EBO setup
-VAO = glGenVertexArrays(1)
-VBO = glGenBuffers(1)
-EBO = glGenBuffers(1)
-
-glBindVertexArray(VAO)
-
-glBindBuffer(GL_ARRAY_BUFFER, VBO)
-glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
-
-glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, EBO)
-glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_STATIC_DRAW)
-
-# Vertex positions
-glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 5 * vertices.itemsize, ctypes.c_void_p(0))
-glEnableVertexAttribArray(0)
-# Texture coords
-glVertexAttribPointer(1, 2, GL_FLOAT, GL_FALSE, 5 * vertices.itemsize, ctypes.c_void_p(3 * vertices.itemsize))
-glEnableVertexAttribArray(1)
-
-# Load texture
-texture = glGenTextures(1)
-glBindTexture(GL_TEXTURE_2D, texture)
-
-# Texture parameters
-glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
-glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
-glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
-glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
-
-# Load image
-image = Image.open("dirt.png")
-image = image.transpose(Image.FLIP_TOP_BOTTOM)
-img_data = image.convert("RGBA").tobytes()
-
-glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, image.width, image.height, 0, GL_RGBA, GL_UNSIGNED_BYTE, img_data)
-glGenerateMipmap(GL_TEXTURE_2D)
-
-# Main loop
-while not glfw.window_should_close(window):
-    glfw.poll_events()
-    glClearColor(0.1, 0.1, 0.1, 1.0)
-    glClear(GL_COLOR_BUFFER_BIT)
-
-    glUseProgram(shader_program)
-    glBindTexture(GL_TEXTURE_2D, texture)
-    glBindVertexArray(VAO)
-    glDrawElements(GL_TRIANGLES, 6, GL_UNSIGNED_INT, None)
-
-    glfw.swap_buffers(window)
-
-# Cleanup
-glDeleteVertexArrays(1, [VAO])
-glDeleteBuffers(1, [VBO])
-glDeleteBuffers(1, [EBO])
-glDeleteProgram(shader_program)
-glfw.terminate()
+
+class ImageScene(Scene):
+    # wait=True blocks at the end of __init__ until the texture is uploaded,
+    # otherwise the quad shows up on the first frame after it is
+
+    def __init__(self, app, path=IMAGE_PATH, wait=False):
+        super().__init__(app)
+
+        # Images are decoded on a worker thread while the rest is set up,
+        # compressed files have nothing to decode and upload as they are
+        self.textures = TextureManager()
+        if path.endswith(COMPRESSED_EXTENSIONS):
+            self.texture = CompressedTexture(path)
+        else:
+            self.texture = self.textures.load(path)
+
+        self.shader_program = ShaderProgram(VERTEX_SHADER_SOURCE, FRAGMENT_SHADER_SOURCE)
+
+        # Quad (two triangles) with texture coordinates
+        vertices = np.array([
+            # positions        # tex coords
+             0.5,  0.5, 0.0,   1.0, 1.0,
+             0.5, -0.5, 0.0,   1.0, 0.0,
+            -0.5, -0.5, 0.0,   0.0, 0.0,
+            -0.5,  0.5, 0.0,   0.0, 1.0
+        ], dtype=np.float32).reshape(4, 5)
+
+        indices = np.array([
+            0, 1, 3,
+            1, 2, 3
+        ], dtype=np.uint32)
+
+        # Corners mapped onto the texture's region, which flips v for
+        # files stored top row first
+        u0, v0, u1, v1 = self.texture.uvs[0]
+        tex_coords = np.where(vertices[:, 3:5] > 0.5, [u1, v1], [u0, v0])
+
+        # Position + texture coordinate attributes
+        self.quad = Mesh(VERTEX_FORMAT.pack(vertices[:, 0:3], tex_coords), VERTEX_FORMAT, indices)
+
+        if wait:
+            self.textures.finish()
+
+    def update(self, delta_time):
+        if self.textures.pending:
+            with self.app.profiler.phase("upload"):
+                self.textures.update()
+            if not self.textures.pending and self.app.profiler.enabled:
+                print(f"{self.app.title}: {self.textures.summary()}")
+
+    def draw(self, renderer):
+        renderer.clear(0.1, 0.1, 0.1)
+        if not self.texture.ready:
+            return
+
+        self.shader_program.use()
+        self.texture.bind()
+        renderer.draw(self.quad)
+
+    def delete(self):
+        self.quad.delete()
+        self.texture.delete()
+        self.textures.delete()
+        self.shader_program.delete()
+
+
+if __name__ == "__main__":
+    App(800, 600, "Dirt Texture").run(ImageScene)
\ No newline at end of file
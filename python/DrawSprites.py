@@ -0,0 +1,101 @@
+import glm
+import numpy as np
+from renderer import App, Scene, SpriteBatch, Texture, TextureArray, TextureAtlas, interpolate, load_image
+
+SPRITE_COUNT = 1000
+
+# Tinted copies of dirt.png, every other one at twice the size
+IMAGE_COUNT = 16
+
+# Pixels per second
+MAX_SPEED = 200.0
+
+
+def dirt_variants(count):
+    # Bottom-up RGBA images: dirt.png tinted around the color wheel
+    dirt = load_image("dirt.png")[0]
+    images = []
+    for index in range(count):
+        hue = index / count * 2.0 * np.pi
+        tint = 0.6 + 0.4 * np.cos(hue + np.array([0.0, 2.0, 4.0]) * np.pi / 3.0)
+        image = dirt.copy()
+        image[..., :3] = np.rint(dirt[..., :3] * tint)
+        if index % 2:
+            image = image.repeat(2, axis=0).repeat(2, axis=1)
+        images.append(image)
+    return images
+
+
+class SpriteScene(Scene):
+    # Bouncing sprites drawn through a SpriteBatch. packing picks where the
+    # images live: "atlas" (one 2D texture), "array" (one texture array)
+    # or "separate" (a texture each, so a draw and a bind per texture run).
+
+    def __init__(self, app, sprite_count=SPRITE_COUNT, packing="atlas", seed=None):
+        super().__init__(app)
+
+        images = dirt_variants(IMAGE_COUNT)
+        if packing == "atlas":
+            self.textures = [TextureAtlas(images)]
+        elif packing == "array":
+            self.textures = [TextureArray(images)]
+        elif packing == "separate":
+            self.textures = []
+            for image in images:
+                texture = Texture()
+                texture.upload([image])
+                self.textures.append(texture)
+        else:
+            raise RuntimeError(f"Unknown sprite packing {packing!r}")
+
+        if app.profiler.enabled and packing != "separate":
+            print(f"{app.title}: {self.textures[0].summary()}")
+
+        rng = np.random.default_rng(seed)
+
+        # Which image each sprite shows, and x, y, width, height in pixels
+        self.images = rng.integers(0, IMAGE_COUNT, sprite_count)
+        self.rectangles = np.zeros((sprite_count, 4), dtype=np.float32)
+        self.rectangles[:, 2:] = np.array([image.shape[1::-1] for image in images], dtype=np.float32)[self.images]
+        self.rectangles[:, :2] = rng.uniform(0.0, 1.0, (sprite_count, 2)) * (np.array([app.width, app.height]) - self.rectangles[:, 2:])
+        self.velocities = rng.uniform(-MAX_SPEED, MAX_SPEED, (sprite_count, 2)).astype(np.float32)
+
+        # Positions as of the tick before; drawn are the rectangles blended
+        # towards the latest tick
+        self.previous = self.rectangles[:, :2].copy()
+        self.drawn = self.rectangles.copy()
+
+        self.batch = SpriteBatch()
+
+    def tick(self, step):
+        positions = self.rectangles[:, :2]
+        self.previous[:] = positions
+        positions += self.velocities * step
+
+        # Bounce off the window edges
+        limits = np.array([self.app.width, self.app.height], dtype=np.float32) - self.rectangles[:, 2:]
+        outside = (positions < 0.0) | (positions > limits)
+        np.negative(self.velocities, out=self.velocities, where=outside)
+        np.clip(positions, 0.0, limits, out=positions)
+
+    def draw(self, renderer):
+        renderer.clear(0.1, 0.1, 0.1)
+
+        self.batch.begin(renderer, glm.ortho(0.0, self.app.width, 0.0, self.app.height, -1.0, 1.0))
+        with self.app.profiler.phase("upload"):
+            interpolate(self.previous, self.rectangles[:, :2], self.app.timestep.alpha, self.drawn[:, :2])
+            if len(self.textures) == 1:
+                self.batch.add(self.textures[0], self.drawn, self.images)
+            else:
+                for rectangle, image in zip(self.drawn, self.images):
+                    self.batch.add(self.textures[image], rectangle)
+        self.batch.end()
+
+    def delete(self):
+        self.batch.delete()
+        for texture in self.textures:
+            texture.delete()
+
+
+if __name__ == "__main__":
+    App(800, 600, "Sprites", show_fps=True).run(SpriteScene)
\ No newline at end of file
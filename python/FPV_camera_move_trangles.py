@@ -1,68 +1,31 @@
-import glfw
-from OpenGL.GL import *
-import numpy as np
+import os
 import glm
-import math
-import time
-import random
-import ctypes
-
-# Initialize GLFW
-if not glfw.init():
-    raise Exception("GLFW can't be initialized!")
-
-window = glfw.create_window(800, 600, "First-Person Random Triangles", None, None)
-if not window:
-    glfw.terminate()
-    raise Exception("GLFW window can't be created!")
-
-glfw.make_context_current(window)
-glfw.set_input_mode(window, glfw.CURSOR, glfw.CURSOR_DISABLED)
-
-# Mouse settings
-first_mouse = True
-lastX, lastY = 400, 300
-yaw = -90.0
-pitch = 0.0
-camera_front = glm.vec3(0.0, 0.0, -1.0)
-
-camera_pos = glm.vec3(0.0, 0.0, 3.0)
-camera_up = glm.vec3(0.0, 1.0, 0.0)
-
-last_frame = time.time()
-delta_time = 0
-
-# FPS counter
-fps_counter = 0
-fps_timer = time.time()
-
-def mouse_callback(window, xpos, ypos):
-    global first_mouse, lastX, lastY, yaw, pitch, camera_front
-
-    sensitivity = 0.1
-
-    if first_mouse:
-        lastX = xpos
-        lastY = ypos
-        first_mouse = False
+import numpy as np
+from renderer import App, Scene, ShaderProgram, Mesh, FirstPersonCamera, BVH, DrawCommands, gl_state, VertexFormat, interpolate, \
+    multi_draw_indirect_supported
+from OpenGL.GL import *
+from block_sim import spawn_blocks, step_blocks, GpuBlockSim, SimulationWorker
 
-    xoffset = (xpos - lastX) * sensitivity
-    yoffset = (lastY - ypos) * sensitivity  # reversed
-    lastX = xpos
-    lastY = ypos
+# Draw all blocks with one glDrawArraysInstanced call (True) or one
+# glDrawArrays per block (False) - flip to A/B the FPS in the title bar
+INSTANCED = True
+BLOCK_COUNT = 500
 
-    yaw += xoffset
-    pitch += yoffset
+# Advance the blocks on the GPU with transform feedback instead of NumPy,
+# the instanced draw then reads offsets straight from the simulation buffers
+GPU_SIMULATION = False
 
-    pitch = max(-89.0, min(89.0, pitch))
+# Step the blocks on a worker thread while the frame before is drawn, the
+# picture runs one frame behind the simulation. A single core gains nothing.
+THREADED_SIMULATION = (os.cpu_count() or 1) > 1
 
-    front = glm.vec3()
-    front.x = math.cos(glm.radians(yaw)) * math.cos(glm.radians(pitch))
-    front.y = math.sin(glm.radians(pitch))
-    front.z = math.sin(glm.radians(yaw)) * math.cos(glm.radians(pitch))
-    camera_front = glm.normalize(front)
+# Skip blocks outside the view, needs the positions on the CPU so it is
+# off with GPU_SIMULATION
+CULLING = True
 
-glfw.set_cursor_pos_callback(window, mouse_callback)
+# Submit the visible ranges of the instanced draw with one
+# glMultiDrawArraysIndirect (GL 4.3) instead of one instanced draw each
+MULTI_DRAW = True
 
 VERTEX_SHADER_SOURCE = """
 #version 330 core
@@ -71,8 +34,11 @@ layout(location = 1) in vec3 aColor;
 
 out vec3 ourColor;
 
-uniform mat4 projection;
-uniform mat4 view;
+layout(std140) uniform Camera {
+    mat4 projection;
+    mat4 view;
+};
+
 uniform mat4 model;
 
 void main() {
@@ -91,173 +57,259 @@ void main() {
 }
 """
 
-def compile_shader(source, shader_type):
-    shader = glCreateShader(shader_type)
-    glShaderSource(shader, source)
-    glCompileShader(shader)
-    if glGetShaderiv(shader, GL_COMPILE_STATUS) != GL_TRUE:
-        raise RuntimeError(glGetShaderInfoLog(shader))
-    return shader
-
-vertex_shader = compile_shader(VERTEX_SHADER_SOURCE, GL_VERTEX_SHADER)
-fragment_shader = compile_shader(FRAGMENT_SHADER_SOURCE, GL_FRAGMENT_SHADER)
-
-shader_program = glCreateProgram()
-glAttachShader(shader_program, vertex_shader)
-glAttachShader(shader_program, fragment_shader)
-glLinkProgram(shader_program)
-
-if glGetProgramiv(shader_program, GL_LINK_STATUS) != GL_TRUE:
-    raise RuntimeError(glGetProgramInfoLog(shader_program))
-
-glDeleteShader(vertex_shader)
-glDeleteShader(fragment_shader)
-
-# Generate 100 random triangles
-triangle_data = []
-triangle_positions = []   # NEW: store each triangle's original position
-triangle_velocities = []  # NEW: store velocity per triangle
-
-for _ in range(500):
-    pos = glm.vec3(random.uniform(-50, 50),
-                   random.uniform(-5, 5),
-                   random.uniform(-50, 50))
-
-    color = glm.vec3(random.random(), random.random(), random.random())
-
-    size = 0.5
-
-    # 3 vertices per triangle
-    triangle = [
-        pos.x, pos.y + size, pos.z, color.r, color.g, color.b,
-        pos.x - size, pos.y - size, pos.z, color.r, color.g, color.b,
-        pos.x + size, pos.y - size, pos.z, color.r, color.g, color.b,
-    ]
-
-    triangle_data.extend(triangle)
-
-    triangle = [
-        pos.x, pos.y + size, pos.z, color.r, color.g, color.b,
-        pos.x, pos.y - size, pos.z - size, color.r, color.g, color.b,
-        pos.x, pos.y - size, pos.z + size, color.r, color.g, color.b,
-    ]
-
-    triangle_data.extend(triangle)
-
-    triangle_positions.append(glm.vec3(pos))  # Store original center position
-    velocity = glm.vec3(random.uniform(-1, 1), random.uniform(-1, 1), random.uniform(-1, 1)) * 5.0
-    triangle_velocities.append(velocity)
-
-triangle_data = np.array(triangle_data, dtype=np.float32)
-
-VBO = glGenBuffers(1)
-VAO = glGenVertexArrays(1)
-
-glBindVertexArray(VAO)
-glBindBuffer(GL_ARRAY_BUFFER, VBO)
-glBufferData(GL_ARRAY_BUFFER, triangle_data.nbytes, triangle_data, GL_STATIC_DRAW)
-
-# Position attribute
-glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 6 * triangle_data.itemsize, ctypes.c_void_p(0))
-glEnableVertexAttribArray(0)
-
-# Color attribute
-glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, 6 * triangle_data.itemsize, ctypes.c_void_p(3 * triangle_data.itemsize))
-glEnableVertexAttribArray(1)
-
-glBindBuffer(GL_ARRAY_BUFFER, 0)
-glBindVertexArray(0)
-
-def process_input(window, delta_time):
-    global camera_pos
-
-    camera_speed = 10.0 * delta_time  # move faster
-
-    flat_front = glm.vec3(camera_front.x, 0.0, camera_front.z)
-    flat_front = glm.normalize(flat_front)
-
-    flat_right = glm.normalize(glm.cross(flat_front, camera_up))
-
-    if glfw.get_key(window, glfw.KEY_W) == glfw.PRESS:
-        camera_pos += flat_front * camera_speed
-    if glfw.get_key(window, glfw.KEY_S) == glfw.PRESS:
-        camera_pos -= flat_front * camera_speed
-    if glfw.get_key(window, glfw.KEY_A) == glfw.PRESS:
-        camera_pos -= flat_right * camera_speed
-    if glfw.get_key(window, glfw.KEY_D) == glfw.PRESS:
-        camera_pos += flat_right * camera_speed
-
-    if glfw.get_key(window, glfw.KEY_LEFT_SHIFT) == glfw.PRESS or glfw.get_key(window, glfw.KEY_RIGHT_SHIFT) == glfw.PRESS:
-        camera_pos -= glm.vec3(0.0, 1.0, 0.0) * camera_speed
-    if glfw.get_key(window, glfw.KEY_SPACE) == glfw.PRESS:
-        camera_pos += glm.vec3(0.0, 1.0, 0.0) * camera_speed
-
-# Main loop
-glEnable(GL_DEPTH_TEST)
-
-while not glfw.window_should_close(window):
-    current_frame = time.time()
-    delta_time = current_frame - last_frame
-    last_frame = current_frame
-
-    glfw.poll_events()
-    process_input(window, delta_time)
-
-    glClearColor(0.1, 0.1, 0.1, 1.0)
-    glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-
-    wid, hei = glfw.get_window_size(window)
-    glViewport(0, 0, wid, hei)
-
-    width, height = glfw.get_framebuffer_size(window)
-    aspect_ratio = width / height
-    projection = glm.perspective(glm.radians(90.0), aspect_ratio, 0.1, 1000.0)
-
-    view = glm.lookAt(camera_pos, camera_pos + camera_front, camera_up)
-
-    glUseProgram(shader_program)
-
-    proj_loc = glGetUniformLocation(shader_program, "projection")
-    view_loc = glGetUniformLocation(shader_program, "view")
-    model_loc = glGetUniformLocation(shader_program, "model")
-
-    glUniformMatrix4fv(proj_loc, 1, GL_FALSE, glm.value_ptr(projection))
-    glUniformMatrix4fv(view_loc, 1, GL_FALSE, glm.value_ptr(view))
+# Same as above, but the block offset and color come from per-instance attributes
+INSTANCED_VERTEX_SHADER_SOURCE = """
+#version 330 core
+layout(location = 0) in vec3 aPos;
+layout(location = 1) in vec3 aColor;
+layout(location = 2) in vec3 aOffset;
 
-    glBindVertexArray(VAO)
+out vec3 ourColor;
 
-    for i in range(len(triangle_positions)):
-        # Update position
-        triangle_positions[i] += triangle_velocities[i] * delta_time
+layout(std140) uniform Camera {
+    mat4 projection;
+    mat4 view;
+};
 
-        # Optional: bounce at some limits
-        if abs(triangle_positions[i].x) > 50:
-            triangle_velocities[i].x *= -1
-        if abs(triangle_positions[i].y) > 10:
-            triangle_velocities[i].y *= -1
-        if abs(triangle_positions[i].z) > 50:
-            triangle_velocities[i].z *= -1
+void main() {
+    gl_Position = projection * view * vec4(aPos + aOffset, 1.0);
+    ourColor = aColor;
+}
+"""
 
-        # Create model matrix
-        model = glm.mat4(1.0)
-        model = glm.translate(model, triangle_positions[i])
-        glUniformMatrix4fv(model_loc, 1, GL_FALSE, glm.value_ptr(model))
+# With GPU simulation the offsets of the last two steps are both on the GPU,
+# blending them happens here
+GPU_VERTEX_SHADER_SOURCE = """
+#version 330 core
+layout(location = 0) in vec3 aPos;
+layout(location = 1) in vec3 aColor;
+layout(location = 2) in vec3 aOffset;
+layout(location = 3) in vec3 aPreviousOffset;
 
-        # Draw two triangles per "block"
-        glDrawArrays(GL_TRIANGLES, i * 6, 6)
+out vec3 ourColor;
 
-    glBindVertexArray(0)
+layout(std140) uniform Camera {
+    mat4 projection;
+    mat4 view;
+};
 
-    fps_counter += 1
-    if current_frame - fps_timer >= 1.0:
-        glfw.set_window_title(window, f"First-Person Random Triangles - FPS: {fps_counter}")
-        fps_counter = 0
-        fps_timer = current_frame
+uniform float alpha;
 
-    glfw.swap_interval(0)
-    glfw.swap_buffers(window)
+void main() {
+    gl_Position = projection * view * vec4(aPos + mix(aPreviousOffset, aOffset, alpha), 1.0);
+    ourColor = aColor;
+}
+"""
 
-glDeleteVertexArrays(1, [VAO])
-glDeleteBuffers(1, [VBO])
-glDeleteProgram(shader_program)
-glfw.terminate()
+size = 0.5
+
+# Per-instance colors as normalized bytes, 4 bytes instead of 12
+COLOR_FORMAT = VertexFormat((3, np.uint8, True))
+
+# One block in local space, two crossed triangles around the origin
+BLOCK_VERTICES = np.array([
+    0.0, size, 0.0,
+    -size, -size, 0.0,
+    size, -size, 0.0,
+
+    0.0, size, 0.0,
+    0.0, -size, -size,
+    0.0, -size, size,
+], dtype=np.float32)
+
+
+class MovingBlocksScene(Scene):
+    def __init__(self, app, block_count=BLOCK_COUNT, instanced=INSTANCED, gpu_simulation=GPU_SIMULATION, seed=None,
+                 culling=CULLING, threaded=THREADED_SIMULATION, multi_draw=MULTI_DRAW):
+        super().__init__(app)
+
+        if gpu_simulation and not instanced:
+            raise Exception("GPU_SIMULATION needs INSTANCED rendering!")
+
+        self.instanced = instanced
+        self.gpu_simulation = gpu_simulation
+        self.culling = culling and not gpu_simulation
+
+        self.camera = FirstPersonCamera()
+        self.camera.attach(app)
+
+        # Block state as contiguous (N, 3) float32 arrays
+        self.positions, self.velocities, self.colors = spawn_blocks(block_count, seed)
+        self.sim_scratch = np.empty_like(self.positions)
+
+        # Positions as of the step before, and what gets drawn: the two
+        # blended by how far the frame is past the latest step
+        self.previous = self.positions.copy()
+        self.blended = self.positions.copy()
+
+        # Steps asked for this frame, handed to the worker together
+        self.worker = None
+        if threaded and not gpu_simulation:
+            self.worker = SimulationWorker(self.positions, self.velocities)
+            self.steps = []
+
+        if self.culling:
+            self.build_bvh()
+
+        if gpu_simulation:
+            self.shader_program = ShaderProgram(GPU_VERTEX_SHADER_SOURCE, FRAGMENT_SHADER_SOURCE)
+        elif instanced:
+            self.shader_program = ShaderProgram(INSTANCED_VERTEX_SHADER_SOURCE, FRAGMENT_SHADER_SOURCE)
+        else:
+            self.shader_program = ShaderProgram(VERTEX_SHADER_SOURCE, FRAGMENT_SHADER_SOURCE)
+
+        if instanced:
+
+            # Position shared by every instance, then color and offset per instance
+            # (with GPU simulation the offset is re-pointed at the latest state)
+            self.mesh = Mesh(BLOCK_VERTICES, (3,))
+            self.color_buffer = self.mesh.add_buffer(COLOR_FORMAT.pack(self.colors), COLOR_FORMAT, divisor=1)
+            self.offset_buffer = self.mesh.add_buffer(self.positions, (3,), divisor=1, usage=GL_DYNAMIC_DRAW)
+        else:
+            # 6 local-space vertices with color per block,
+            # the model matrix moves them to the block position
+            self.triangle_data = np.empty((block_count, 6, 6), dtype=np.float32)
+            self.triangle_data[:, :, 0:3] = BLOCK_VERTICES.reshape(6, 3)
+            self.triangle_data[:, :, 3:6] = self.colors[:, None, :]
+
+            self.mesh = Mesh(self.triangle_data, (3, 3))
+
+        # Instanced ranges need base instances, there is no GL 3.3 fallback:
+        # without them every range is drawn on its own
+        self.draws = None
+        if instanced and self.culling and multi_draw and multi_draw_indirect_supported():
+            self.draws = DrawCommands(self.mesh, self.bvh.leaves, indirect=True)
+            mode_suffix = ", multi-draw"
+        else:
+            mode_suffix = ""
+
+        if gpu_simulation:
+            self.gpu_sim = GpuBlockSim(self.positions, self.velocities)
+
+        mode = ("instanced" if instanced else "per-draw") + mode_suffix
+        if gpu_simulation:
+            mode += ", GPU simulation"
+        elif self.worker is not None:
+            mode += ", threaded simulation"
+        app.title = f"{app.title} ({mode})"
+
+        gl_state.enable(GL_DEPTH_TEST)
+
+    def build_bvh(self):
+        # Sorts the blocks into BVH order, leaves become contiguous ranges
+        self.bvh = BVH(self.positions, size)
+        order = self.bvh.order
+        self.positions[:] = self.positions[order]
+        self.previous[:] = self.previous[order]
+        self.blended[:] = self.blended[order]
+        self.velocities[:] = self.velocities[order]
+        self.colors[:] = self.colors[order]
+        if self.worker is not None:
+            self.worker.permute(order)
+
+    def rebuild_bvh(self):
+        # Blocks drift apart from their leaf mates, re-sort them now and then
+        self.build_bvh()
+        if self.instanced:
+            self.mesh.update(COLOR_FORMAT.pack(self.colors), self.color_buffer)
+        else:
+            self.triangle_data[:, :, 3:6] = self.colors[:, None, :]
+            self.mesh.update(self.triangle_data)
+
+    def tick(self, step):
+        # Update positions and bounce at the limits, all blocks at once
+        if self.gpu_simulation:
+            self.gpu_sim.step(step)
+        elif self.worker is not None:
+            self.steps.append(step)
+        else:
+            self.previous[:] = self.positions
+            step_blocks(self.positions, self.velocities, step, self.sim_scratch)
+
+    def update(self, delta_time):
+        self.camera.process_input(self.app, delta_time)
+
+        if self.gpu_simulation:
+            return
+
+        if self.worker is not None:
+            # Last frame's steps, run while that frame was drawn
+            self.worker.finish()
+            interpolate(self.worker.previous, self.worker.latest, self.app.timestep.alpha, self.blended)
+        else:
+            interpolate(self.previous, self.positions, self.app.timestep.alpha, self.blended)
+
+        # Culled where they are drawn
+        if self.culling:
+            self.bvh.refit(self.blended)
+            if self.bvh.needs_rebuild:
+                self.rebuild_bvh()
+
+        if self.worker is not None:
+            self.worker.start(self.steps)
+            self.steps = []
+
+    def draw(self, renderer):
+        renderer.clear(0.1, 0.1, 0.1, depth=True)
+
+        renderer.set_camera(self.camera)
+
+        self.shader_program.use()
+
+        # Visible (first, count) block ranges
+        if self.culling:
+            ranges = self.bvh.cull(self.camera.planes)
+        else:
+            ranges = [(0, len(self.positions))]
+
+        if self.gpu_simulation:
+            # Positions are already on the GPU, interleaved with velocities
+            stride = 6 * self.positions.itemsize
+            self.mesh.attach_buffer(self.gpu_sim.buffer, (3,), 2, divisor=1, stride=stride)
+            self.mesh.attach_buffer(self.gpu_sim.previous_buffer, (3,), 3, divisor=1, stride=stride)
+            self.shader_program.set_float("alpha", self.app.timestep.alpha)
+            renderer.draw(self.mesh, instances=self.gpu_sim.count)
+        elif self.instanced:
+            # Upload all offsets at once and draw every block in one call
+            with self.app.profiler.phase("upload"):
+                self.mesh.update(self.blended, self.offset_buffer)
+
+            if self.draws is not None:
+                # One command per range, its instances start at `first` of
+                # the per-instance buffers, which stay attached from 0
+                ranges = np.array(ranges, dtype=np.int64).reshape(-1, 2)
+                self.draws.set(0, self.mesh.vertex_count, ranges[:, 1], ranges[:, 0])
+                renderer.multi_draw(self.draws)
+            else:
+                # One instanced draw per range, its instances start at
+                # `first` of the per-instance buffers
+                for first, count in ranges:
+                    self.mesh.attach_buffer(self.color_buffer, COLOR_FORMAT, 1, divisor=1, offset=first * COLOR_FORMAT.stride)
+                    self.mesh.attach_buffer(self.offset_buffer, (3,), 2, divisor=1, offset=first * self.blended.strides[0])
+                    renderer.draw(self.mesh, instances=count)
+        else:
+            model_loc = self.shader_program.uniform_location("model")
+
+            for first, count in ranges:
+                for i in range(first, first + count):
+                    # Create model matrix
+                    model = glm.mat4(1.0)
+                    model = glm.translate(model, glm.vec3(*self.blended[i]))
+                    self.shader_program.set_mat4_at(model_loc, model)
+
+                    # Draw two triangles per "block"
+                    renderer.draw(self.mesh, i * 6, 6)
+
+    def delete(self):
+        if self.worker is not None:
+            self.worker.delete()
+        if self.gpu_simulation:
+            self.gpu_sim.delete()
+        if self.draws is not None:
+            self.draws.delete()
+        self.mesh.delete()
+        self.shader_program.delete()
+
+
+if __name__ == "__main__":
+    App(800, 600, "First-Person Random Triangles", show_fps=True).run(MovingBlocksScene)
\ No newline at end of file
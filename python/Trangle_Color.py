@@ -1,7 +1,5 @@
-import glfw
-import random
-from OpenGL.GL import *
 import numpy as np
+from renderer import App, Scene, ShaderProgram, Mesh
 
 
 
@@ -33,75 +31,32 @@ void main()
 """
 
 
-glfw.init()
-window = glfw.create_window(800, 600, "TRIANGLE", None, None)
-glfw.make_context_current(window)
+class ColorTriangleScene(Scene):
+    def __init__(self, app):
+        super().__init__(app)
 
+        self.shader_program = ShaderProgram(VERTEX_SHADER_SOURCE, FRAGMENT_SHADER_SOURCE)
 
-def compile_shader(source, shader_type):
-    shader = glCreateShader(shader_type)
-    glShaderSource(shader, source)
-    glCompileShader(shader)
-    if glGetShaderiv(shader, GL_COMPILE_STATUS) != GL_TRUE:
-        raise RuntimeError(glGetShaderInfoLog(shader))
-    return shader
+        vertices = np.array([
+            # positions       # colors
+             0.0,  0.5, 0.0,   1.0, 0.0, 0.0,
+            -0.5, -0.5, 0.0,   0.0, 1.0, 0.0,
+             0.5, -0.5, 0.0,   0.0, 0.0, 1.0
+        ], dtype=np.float32)
 
-vertex_shader = compile_shader(VERTEX_SHADER_SOURCE, GL_VERTEX_SHADER)
-fragment_shader = compile_shader(FRAGMENT_SHADER_SOURCE, GL_FRAGMENT_SHADER)
+        # Position + color attributes
+        self.mesh = Mesh(vertices, (3, 3))
 
-shader_program = glCreateProgram()
+    def draw(self, renderer):
+        renderer.clear(0.1, 0.1, 0.1)
 
-glAttachShader(shader_program, vertex_shader)
-glAttachShader(shader_program, fragment_shader)
+        self.shader_program.use()
+        renderer.draw(self.mesh)
 
-glLinkProgram(shader_program)
+    def delete(self):
+        self.mesh.delete()
+        self.shader_program.delete()
 
-glDeleteShader(vertex_shader)
-glDeleteShader(fragment_shader)
 
-
-vertices = np.array([
-    # positions       # colors
-     0.0,  0.5, 0.0,   1.0, 0.0, 0.0,
-    -0.5, -0.5, 0.0,   0.0, 1.0, 0.0,
-     0.5, -0.5, 0.0,   0.0, 0.0, 1.0
-], dtype=np.float32)
-
-
-VBO = glGenBuffers(1)
-VAO = glGenVertexArrays(1)
-
-glBindVertexArray(VAO)
-glBindBuffer(GL_ARRAY_BUFFER, VBO)
-glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
-
-glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 6 * vertices.itemsize, ctypes.c_void_p(0))
-glEnableVertexAttribArray(0)
-
-# Color attribute
-glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, 6 * vertices.itemsize, ctypes.c_void_p(3 * vertices.itemsize))
-glEnableVertexAttribArray(1)
-
-glBindBuffer(GL_ARRAY_BUFFER, 0)
-glBindVertexArray(0)
-
-
-while not glfw.window_should_close(window):
-    glfw.poll_events()
-
-    glClearColor(0.1, 0.1, 0.1, 1.0)
-    glClear(GL_COLOR_BUFFER_BIT)
-
-
-    glUseProgram(shader_program)
-
-    glBindVertexArray(VAO)
-    glDrawArrays(GL_TRIANGLES, 0, len(vertices))
-
-    glfw.swap_interval(0)
-    glfw.swap_buffers(window)
-
-glDeleteVertexArrays(1, [VAO])
-glDeleteBuffers(1, [VBO])
-glDeleteProgram(shader_program)
-glfw.terminate()
+if __name__ == "__main__":
+    App(800, 600, "TRIANGLE").run(ColorTriangleScene)
\ No newline at end of file
@@ -1,8 +1,6 @@
-import glm
-import glfw
 import random
-from OpenGL.GL import *
 import numpy as np
+from renderer import App, Camera, Scene, ShaderProgram, Mesh
 
 
 
@@ -36,98 +34,50 @@ void main()
 """
 
 
-glfw.init()
-window = glfw.create_window(800, 600, "TRIANGLE", None, None)
-glfw.make_context_current(window)
+class ProjectedTrianglesScene(Scene):
+    def __init__(self, app, seed=None):
+        super().__init__(app)
 
+        self.shader_program = ShaderProgram(VERTEX_SHADER_SOURCE, FRAGMENT_SHADER_SOURCE)
 
-def compile_shader(source, shader_type):
-    shader = glCreateShader(shader_type)
-    glShaderSource(shader, source)
-    glCompileShader(shader)
-    if glGetShaderiv(shader, GL_COMPILE_STATUS) != GL_TRUE:
-        raise RuntimeError(glGetShaderInfoLog(shader))
-    return shader
+        rng = random.Random(seed)
 
-vertex_shader = compile_shader(VERTEX_SHADER_SOURCE, GL_VERTEX_SHADER)
-fragment_shader = compile_shader(FRAGMENT_SHADER_SOURCE, GL_FRAGMENT_SHADER)
+        vertices_load = []
+        for i in range(30):
+            vertices_load.append(rng.uniform(-1.0, 1.0)) # x
+            vertices_load.append(rng.uniform(-1.0, 1.0)) # y
+            vertices_load.append(rng.uniform(-1.0, 1.0)) # z
 
-shader_program = glCreateProgram()
+            vertices_load.append(rng.uniform(0.0, 1.0)) # R
+            vertices_load.append(rng.uniform(0.0, 1.0)) # g
+            vertices_load.append(rng.uniform(0.0, 1.0)) # b
 
-glAttachShader(shader_program, vertex_shader)
-glAttachShader(shader_program, fragment_shader)
+        vertices = np.array(vertices_load, dtype=np.float32)
 
-glLinkProgram(shader_program)
+        # Position + color attributes
+        self.mesh = Mesh(vertices, (3, 3))
 
-glDeleteShader(vertex_shader)
-glDeleteShader(fragment_shader)
+        # Looks down -z from the origin, so only the projection matters
+        self.camera = Camera(fov=90.0)
+        self.camera.attach(app)
+        app.set_scroll_callback(self.scroll_callback)
 
+    def scroll_callback(self, xoffset, yoffset):
+        self.camera.zoom(yoffset * 2)
 
-vertices_load = []
-for i in range(30):
-    vertices_load.append(random.uniform(-1.0, 1.0)) # x
-    vertices_load.append(random.uniform(-1.0, 1.0)) # y
-    vertices_load.append(random.uniform(-1.0, 1.0)) # z
+    def draw(self, renderer):
+        renderer.clear(0.1, 0.1, 0.1)
 
-    vertices_load.append(random.uniform(0.0, 1.0)) # R
-    vertices_load.append(random.uniform(0.0, 1.0)) # g
-    vertices_load.append(random.uniform(0.0, 1.0)) # b
+        self.shader_program.use()
 
-vertices = np.array(vertices_load, dtype=np.float32)
+        self.shader_program.set_mat4("projection", self.camera.buffer[0])
 
+        renderer.draw(self.mesh)
 
-VBO = glGenBuffers(1)
-VAO = glGenVertexArrays(1)
+    def delete(self):
+        self.mesh.delete()
+        self.shader_program.delete()
 
-glBindVertexArray(VAO)
-glBindBuffer(GL_ARRAY_BUFFER, VBO)
-glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
 
-glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 6 * vertices.itemsize, ctypes.c_void_p(0))
-glEnableVertexAttribArray(0)
-
-# Color attribute
-glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, 6 * vertices.itemsize, ctypes.c_void_p(3 * vertices.itemsize))
-glEnableVertexAttribArray(1)
-
-glBindBuffer(GL_ARRAY_BUFFER, 0)
-glBindVertexArray(0)
-
-
-fov = 90.0
-
-def scroll_callback(window, xoffset, yoffset):
-    global fov
-    fov -= yoffset * 2
-    fov = max(1.0, min(180.0, fov))
-
-glfw.set_scroll_callback(window, scroll_callback)
-
-
-while not glfw.window_should_close(window):
-    glfw.poll_events()
-
-    glClearColor(0.1, 0.1, 0.1, 1.0)
-    glClear(GL_COLOR_BUFFER_BIT)
-
-
-    glUseProgram(shader_program)
-
-    width, height = glfw.get_framebuffer_size(window)
-    aspect_ratio = width / height
-    projection = glm.perspective(glm.radians(fov), aspect_ratio, 0.1, 1000.0)
-
-    proj_loc = glGetUniformLocation(shader_program, "projection")
-    glUniformMatrix4fv(proj_loc, 1, GL_FALSE, glm.value_ptr(projection))
-
-
-    glBindVertexArray(VAO)
-    glDrawArrays(GL_TRIANGLES, 0, len(vertices))
-
-    glfw.swap_interval(0)
-    glfw.swap_buffers(window)
-
-glDeleteVertexArrays(1, [VAO])
-glDeleteBuffers(1, [VBO])
-glDeleteProgram(shader_program)
-glfw.terminate()
\ No newline at end of file
+if __name__ == "__main__":
+    App(800, 600, "TRIANGLE").run(ProjectedTrianglesScene)
\ No newline at end of file
@@ -1,27 +1,28 @@
 import glm
-import time
 import glfw
-import random
-from OpenGL.GL import *
 import numpy as np
+from renderer import App, Camera, Scene, ShaderProgram
+from world_grid import ChunkedGrid
 
+# Floor size in tiles, every tile is one quad
+FLOOR_WIDTH = 30
+FLOOR_HEIGHT = 25
 
 
 
 
 
-fps_counter = 0
-time_fps = time.time()
-
-player_pos = glm.vec3(0, 0, -5)
-
-
 VERTEX_SHADER_SOURCE = """
 #version 330 core
 layout(location = 0) in vec3 aPos;
 layout(location = 1) in vec3 aColor;
 
-uniform mat4 projection;
+// Only the projection is used, this scene has no view matrix
+layout(std140) uniform Camera {
+    mat4 projection;
+    mat4 view;
+};
+
 uniform mat4 model;
 
 out vec3 ourColor;
@@ -45,123 +46,51 @@ void main()
 """
 
 
-glfw.init()
-window = glfw.create_window(950, 500, "TRIANGLE", None, None)
-glfw.make_context_current(window)
-
-
-def compile_shader(source, shader_type):
-    shader = glCreateShader(shader_type)
-    glShaderSource(shader, source)
-    glCompileShader(shader)
-    if glGetShaderiv(shader, GL_COMPILE_STATUS) != GL_TRUE:
-        raise RuntimeError(glGetShaderInfoLog(shader))
-    return shader
-
-vertex_shader = compile_shader(VERTEX_SHADER_SOURCE, GL_VERTEX_SHADER)
-fragment_shader = compile_shader(FRAGMENT_SHADER_SOURCE, GL_FRAGMENT_SHADER)
-
-shader_program = glCreateProgram()
-
-glAttachShader(shader_program, vertex_shader)
-glAttachShader(shader_program, fragment_shader)
-
-glLinkProgram(shader_program)
-
-glDeleteShader(vertex_shader)
-glDeleteShader(fragment_shader)
-
-
-vertices_load = []
-for y in range(-5, -30, -1):
-    for x in range(-15, 15, 1):
-        triangle = [
-            x, y, -5, 0, 1, 0,
-            x + 1, y, -5, 0, 0.5, 0,
-            x, y + 1, -5, 0, 0.5, 0,
-
-
-            x + 1, y + 1, -5, 0, 0.5, 0,
-            x + 1, y, -5, 0, 0.5, 0,
-            x, y + 1, -5, 0, 0.5, 0
-        ]
-
-        vertices_load.extend(triangle)
-
-vertices_blocks = np.array(vertices_load, dtype=np.float32)
-
-
-VBO = glGenBuffers(1)
-VAO_Blocks = glGenVertexArrays(1)
-
-glBindVertexArray(VAO_Blocks)
-glBindBuffer(GL_ARRAY_BUFFER, VBO)
-glBufferData(GL_ARRAY_BUFFER, vertices_blocks.nbytes, vertices_blocks, GL_STATIC_DRAW)
-
-glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 6 * vertices_blocks.itemsize, ctypes.c_void_p(0))
-glEnableVertexAttribArray(0)
-
-# Color attribute
-glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, 6 * vertices_blocks.itemsize, ctypes.c_void_p(3 * vertices_blocks.itemsize))
-glEnableVertexAttribArray(1)
-
-glBindBuffer(GL_ARRAY_BUFFER, 0)
-glBindVertexArray(0)
-
-
-
-fov = 90.0
-
-def scroll_callback(window, xoffset, yoffset):
-    global fov
-    fov -= yoffset * 2
-    fov = max(1.0, min(180.0, fov))
-
-glfw.set_scroll_callback(window, scroll_callback)
-
+class FloorScene(Scene):
+    def __init__(self, app, width=FLOOR_WIDTH, height=FLOOR_HEIGHT):
+        super().__init__(app)
 
-while not glfw.window_should_close(window):
-    glfw.poll_events()
+        self.shader_program = ShaderProgram(VERTEX_SHADER_SOURCE, FRAGMENT_SHADER_SOURCE)
 
-    if glfw.get_key(window, glfw.KEY_D) == glfw.PRESS:
-        player_pos.x -= 0.1
-    if glfw.get_key(window, glfw.KEY_A) == glfw.PRESS:
-        player_pos.x += 0.1
+        # Tiles from x = -width / 2 rightwards and y = -5 downwards,
+        # chunk meshes are built on the first draw
+        tiles = np.ones((height, width), dtype=np.uint8)
+        self.blocks = ChunkedGrid(tiles, origin=(-(width // 2), -4 - height), z=-5)
+        if app.profiler.enabled:
+            print(f"{app.title}: {self.blocks.summary()}")
 
+        self.player_pos = glm.vec3(0, 0, -5)
 
-    glClearColor(0.1, 0.1, 0.1, 1.0)
-    glClear(GL_COLOR_BUFFER_BIT)
+        # Looks down -z from the origin, its view is the identity
+        self.camera = Camera(fov=90.0)
+        self.camera.attach(app)
+        app.set_scroll_callback(self.scroll_callback)
 
-    wid, hei = glfw.get_window_size(window)
-    glViewport(0, 0, wid, hei)
+    def scroll_callback(self, xoffset, yoffset):
+        self.camera.zoom(yoffset * 2)
 
-    glUseProgram(shader_program)
+    def update(self, delta_time):
+        if self.app.is_key_pressed(glfw.KEY_D):
+            self.player_pos.x -= 0.1
+        if self.app.is_key_pressed(glfw.KEY_A):
+            self.player_pos.x += 0.1
 
-    width, height = glfw.get_framebuffer_size(window)
-    aspect_ratio = width / height
-    projection = glm.perspective(glm.radians(fov), aspect_ratio, 0.1, 1000.0)
+    def draw(self, renderer):
+        renderer.clear(0.1, 0.1, 0.1)
 
-    model_player = glm.translate(glm.mat4(1), player_pos)
-    model_loc = glGetUniformLocation(shader_program, "model")
-    glUniformMatrix4fv(model_loc, 1, GL_FALSE, glm.value_ptr(model_player))
+        renderer.set_camera(self.camera)
 
-    proj_loc = glGetUniformLocation(shader_program, "projection")
-    glUniformMatrix4fv(proj_loc, 1, GL_FALSE, glm.value_ptr(projection))
+        self.shader_program.use()
 
-    glBindVertexArray(VAO_Blocks)
-    glDrawArrays(GL_TRIANGLES, 0, len(vertices_blocks))
+        model_player = glm.translate(glm.mat4(1), self.player_pos)
+        self.shader_program.set_mat4("model", model_player)
 
-    glfw.swap_interval(0)
-    glfw.swap_buffers(window)
+        self.blocks.draw(renderer)
 
-    if (time.time() - time_fps) > 1.0:
-        glfw.set_window_title(window, f"FPS: {fps_counter}")
-        fps_counter = 0
-        time_fps = time.time()
+    def delete(self):
+        self.blocks.delete()
+        self.shader_program.delete()
 
-    fps_counter += 1
 
-glDeleteVertexArrays(1, [VAO_Blocks])
-glDeleteBuffers(1, [VBO])
-glDeleteProgram(shader_program)
-glfw.terminate()
\ No newline at end of file
+if __name__ == "__main__":
+    App(950, 500, "TRIANGLE", show_fps=True).run(FloorScene)
\ No newline at end of file
@@ -0,0 +1,275 @@
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import importlib
+import numpy as np
+
+# Always offscreen, whatever display is around, so runs are comparable
+os.environ["OPENGL_TEST_HEADLESS"] = "1"
+
+import glm
+import glfw
+from renderer import App, COUNTERS, FAST, InputRecording, stats
+from renderer.program_cache import default_cache
+from renderer.input import CURSOR_EVENT, KEY_EVENT
+from OpenGL.GL import *
+
+# Fixed simulation step, the scenes see the same deltas on every run
+DELTA_TIME = 1.0 / 60.0
+
+
+def orbit_camera(scene, t):
+    # Circles the FirstPersonCamera around the middle of the block field
+    angle = t * 0.5
+    scene.camera.position = glm.vec3(30.0 * math.cos(angle), 2.0, 30.0 * math.sin(angle))
+    scene.camera.look(math.degrees(angle) + 180.0, -5.0)
+
+
+def sway_player(scene, t):
+    scene.player_pos.x = 5.0 * math.sin(t)
+
+
+def walk_recording(frames=4000):
+    # Input a player could have recorded: walks forward turning right the
+    # whole time, strafing right for 2 of every 4 seconds
+    events = [(1, KEY_EVENT, glfw.KEY_W, 1)]
+    for frame in range(1, frames + 1):
+        events.append((frame, CURSOR_EVENT, frame * 4.0, 0.0))
+        if frame % 240 == 120:
+            events.append((frame, KEY_EVENT, glfw.KEY_D, 1))
+        elif frame % 240 == 0:
+            events.append((frame, KEY_EVENT, glfw.KEY_D, 0))
+    return InputRecording(events)
+
+
+# name, script module, scene class, scene kwargs, scripted input (a function
+# of the scene and time, or an InputRecording to replay). Sizes that step by
+# 10x show how frame time scales with the triangle/block count.
+CASES = [
+    ("triangle", "Trangle", "TriangleScene", {}, None),
+    ("triangle-color", "Trangle_Color", "ColorTriangleScene", {}, None),
+    ("many-triangles", "Many_Trangles_with_Colors", "ManyTrianglesScene", {"seed": True}, None),
+    ("projection", "Trangles_with_Projection", "ProjectedTrianglesScene", {"seed": True}, None),
+    ("floor", "Trangles_with_Projection_with_model", "FloorScene", {}, sway_player),
+    ("floor-1m", "Trangles_with_Projection_with_model", "FloorScene", {"width": 1000, "height": 1000}, sway_player),
+    ("image", "DrawImage", "ImageScene", {"wait": True}, None),
+    ("image-bc1", "DrawImage", "ImageScene", {"path": "dirt.dds"}, None),
+    ("sprites-10k", "DrawSprites", "SpriteScene", {"sprite_count": 10_000, "seed": True}, None),
+    ("sprites-array-10k", "DrawSprites", "SpriteScene", {"sprite_count": 10_000, "packing": "array", "seed": True}, None),
+    ("sprites-separate-1k", "DrawSprites", "SpriteScene", {"sprite_count": 1_000, "packing": "separate", "seed": True}, None),
+    ("fpv-random-blocks", "FPV_camera", "RandomBlocksScene", {"seed": True}, orbit_camera),
+    ("fpv-random-blocks-per-range", "FPV_camera", "RandomBlocksScene", {"seed": True, "multi_draw": False}, orbit_camera),
+    ("fpv-random-blocks-no-culling", "FPV_camera", "RandomBlocksScene", {"seed": True, "culling": False}, orbit_camera),
+    ("fpv-random-blocks-walk", "FPV_camera", "RandomBlocksScene", {"seed": True}, walk_recording()),
+    ("dvd-100", "DVD_TRIANGLES", "DvdScene", {"triangle_count": 100, "seed": True}, None),
+    ("dvd-1k", "DVD_TRIANGLES", "DvdScene", {"triangle_count": 1_000, "seed": True}, None),
+    ("dvd-10k", "DVD_TRIANGLES", "DvdScene", {"triangle_count": 10_000, "seed": True}, None),
+    ("dvd-color-10k", "DVD_TRIANGLES_COLOR", "DvdColorScene", {"triangle_count": 10_000, "seed": True}, None),
+    ("blocks-per-draw-500", "FPV_camera_move_trangles", "MovingBlocksScene",
+     {"block_count": 500, "instanced": False, "seed": True}, orbit_camera),
+    ("blocks-instanced-500", "FPV_camera_move_trangles", "MovingBlocksScene",
+     {"block_count": 500, "seed": True}, orbit_camera),
+    ("blocks-instanced-50k", "FPV_camera_move_trangles", "MovingBlocksScene",
+     {"block_count": 50_000, "seed": True, "threaded": True}, orbit_camera),
+    ("blocks-instanced-50k-per-range", "FPV_camera_move_trangles", "MovingBlocksScene",
+     {"block_count": 50_000, "seed": True, "threaded": True, "multi_draw": False}, orbit_camera),
+    ("blocks-instanced-50k-no-culling", "FPV_camera_move_trangles", "MovingBlocksScene",
+     {"block_count": 50_000, "seed": True, "culling": False}, orbit_camera),
+    ("blocks-instanced-50k-serial", "FPV_camera_move_trangles", "MovingBlocksScene",
+     {"block_count": 50_000, "seed": True, "threaded": False}, orbit_camera),
+    ("blocks-gpu-50k", "FPV_camera_move_trangles", "MovingBlocksScene",
+     {"block_count": 50_000, "gpu_simulation": True, "seed": True}, orbit_camera),
+]
+
+# Percentiles reported for the frame times
+PERCENTILES = (50, 95, 99)
+
+
+def summarize(values):
+    values = np.asarray(values, dtype=np.float64)
+    summary = {f"p{p}": float(np.percentile(values, p)) for p in PERCENTILES}
+    summary["mean"] = float(values.mean())
+    summary["max"] = float(values.max())
+    return summary
+
+
+# Shader programs linked from cached binaries while a scene is built,
+# the startup the program cache saves
+PROGRAM_CACHE_COUNTERS = ("hits", "misses", "rejected")
+
+
+def program_cache_counters():
+    return tuple(getattr(default_cache, name) for name in PROGRAM_CACHE_COUNTERS)
+
+
+def run_case(case, frames, warmup, seed, width, height, replay=None):
+    # replay, an InputRecording, stands in for the case's own script
+    name, module, scene_class, kwargs, script = case
+    scene_class = getattr(importlib.import_module(module), scene_class)
+    kwargs = {key: seed if value is True and key == "seed" else value for key, value in kwargs.items()}
+    if replay is not None:
+        script = replay
+
+    app = App(width, height, name, headless=True)
+    if isinstance(script, InputRecording):
+        app.input.replay(script)
+        script = None
+    start_stats = stats.snapshot()
+    start_programs = program_cache_counters()
+    scene = scene_class(app, **kwargs)
+    setup = np.subtract(stats.snapshot(), start_stats)
+    setup_programs = np.subtract(program_cache_counters(), start_programs)
+
+    cpu_times = []
+    frame_times = []
+    counters = []
+
+    for frame in range(warmup + frames):
+        if script is not None:
+            script(scene, frame * DELTA_TIME)
+
+        before = stats.snapshot()
+        start = time.perf_counter()
+        app.frame(scene, DELTA_TIME)
+        submitted = time.perf_counter()
+        # Wait for the GPU so its work lands in this frame, not a later one
+        glFinish()
+        finished = time.perf_counter()
+        after = stats.snapshot()
+
+        if frame >= warmup:
+            cpu_times.append((submitted - start) * 1000.0)
+            frame_times.append((finished - start) * 1000.0)
+            counters.append(np.subtract(after, before))
+
+    scene.delete()
+    app.close()
+
+    # Counters as per-frame means, plus what building the scene cost
+    result = {
+        "frames": frames,
+        "cpu_ms": summarize(cpu_times),
+        "frame_ms": summarize(frame_times),
+    }
+    result.update(zip(COUNTERS, np.mean(counters, axis=0).tolist()))
+    result.update((f"setup_{name}", int(value)) for name, value in zip(COUNTERS, setup))
+    result.update((f"setup_program_cache_{name}", int(value)) for name, value in zip(PROGRAM_CACHE_COUNTERS, setup_programs))
+    return result
+
+
+def gl_info():
+    # Needs a current context, so read while one is alive
+    app = App(16, 16, "info", headless=True)
+    info = {name.lower(): glGetString(value).decode() for name, value in
+            (("VENDOR", GL_VENDOR), ("RENDERER", GL_RENDERER), ("VERSION", GL_VERSION))}
+    app.close()
+    return info
+
+
+def run(names, frames, warmup, seed, width, height, replay=None):
+    cases = [case for case in CASES if not names or case[0] in names]
+    unknown = set(names) - {case[0] for case in cases}
+    if unknown:
+        raise SystemExit(f"Unknown case(s): {', '.join(sorted(unknown))}")
+
+    results = {
+        "meta": {
+            "frames": frames,
+            "warmup": warmup,
+            "seed": seed,
+            "size": [width, height],
+            "replay": replay,
+            "fast": FAST,
+            "python": sys.version.split()[0],
+            "platform": sys.platform,
+            "gl": gl_info(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "cases": {},
+    }
+
+    recording = InputRecording.load(replay) if replay else None
+    for case in cases:
+        result = run_case(case, frames, warmup, seed, width, height, recording)
+        results["cases"][case[0]] = result
+        objects = result["objects_drawn"] + result["objects_culled"]
+        print(f"{case[0]:<32} cpu p50 {result['cpu_ms']['p50']:8.3f} ms  p99 {result['cpu_ms']['p99']:8.3f} ms  "
+              f"frame p50 {result['frame_ms']['p50']:8.3f} ms  draws {result['draw_calls']:7.0f}  "
+              f"upload {result['bytes_uploaded'] / 1024:10.1f} KiB"
+              + (f"  objects {result['objects_drawn']:.0f}/{objects:.0f}" if objects else ""), file=sys.stderr)
+
+    return results
+
+
+def compare(base, new, threshold):
+    # Prints per-case changes, returns the cases slower by more than threshold
+    regressions = []
+    print(f"{'case':<32} {'metric':<10} {'base':>10} {'new':>10} {'change':>8}")
+
+    for name, new_result in new["cases"].items():
+        base_result = base["cases"].get(name)
+        if base_result is None:
+            print(f"{name:<32} (new case)")
+            continue
+
+        for metric in ("cpu_ms", "frame_ms"):
+            for p in PERCENTILES:
+                old, now = base_result[metric][f"p{p}"], new_result[metric][f"p{p}"]
+                change = (now - old) / old if old else 0.0
+                flag = ""
+                if change > threshold:
+                    flag = "  REGRESSION"
+                    regressions.append(name)
+                print(f"{name:<32} {metric[:-3] + ' p' + str(p):<10} {old:10.3f} {now:10.3f} {change:+8.1%}{flag}")
+
+        for metric in COUNTERS:
+            old, now = base_result.get(metric, 0), new_result.get(metric, 0)
+            if old != now:
+                print(f"{name:<32} {metric:<10} {old:10.0f} {now:10.0f}")
+
+    return sorted(set(regressions))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless frame-time benchmark of the demo scenes")
+    parser.add_argument("cases", nargs="*", help="case names to run, all by default")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--size", type=int, nargs=2, default=(800, 600), metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--replay", metavar="FILE", help="drive every case with this recorded input instead")
+    parser.add_argument("-o", "--output", help="write the JSON results here instead of stdout")
+    parser.add_argument("--list", action="store_true", help="list the cases and exit")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="compare two result files")
+    parser.add_argument("--threshold", type=float, default=0.1, help="slowdown counted as a regression")
+    args = parser.parse_args()
+
+    if args.list:
+        for case in CASES:
+            print(case[0])
+        return
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            base = json.load(f)
+        with open(args.compare[1]) as f:
+            new = json.load(f)
+        regressions = compare(base, new, args.threshold)
+        if regressions:
+            raise SystemExit(f"Regressed: {', '.join(regressions)}")
+        return
+
+    results = run(args.cases, args.frames, args.warmup, args.seed, *args.size, replay=args.replay)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
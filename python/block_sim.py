@@ -0,0 +1,212 @@
+import ctypes
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from renderer import App, ShaderProgram, Mesh, gl_state
+from OpenGL.GL import *
+
+# Blocks bounce back once they leave this box around the origin
+BOUNDS = np.array([50.0, 10.0, 50.0], dtype=np.float32)
+
+
+def spawn_blocks(count, seed=None):
+    rng = np.random.default_rng(seed)
+
+    positions = np.empty((count, 3), dtype=np.float32)
+    positions[:, 0] = rng.uniform(-50, 50, count)
+    positions[:, 1] = rng.uniform(-5, 5, count)
+    positions[:, 2] = rng.uniform(-50, 50, count)
+
+    velocities = (rng.uniform(-1, 1, (count, 3)) * 5.0).astype(np.float32)
+    colors = rng.random((count, 3), dtype=np.float32)
+
+    return positions, velocities, colors
+
+
+def step_blocks(positions, velocities, delta_time, scratch=None):
+    # Integrate and bounce every block in place, same rules as the old
+    # per-block loop: move, then flip each axis that is out of bounds
+    if scratch is None:
+        scratch = np.empty_like(positions)
+
+    np.multiply(velocities, np.float32(delta_time), out=scratch)
+    positions += scratch
+
+    np.abs(positions, out=scratch)
+    np.negative(velocities, out=velocities, where=scratch > BOUNDS)
+
+
+class SimulationWorker:
+    # Runs step_blocks on a worker thread, one frame behind the ticks asked
+    # for: start() hands the worker a frame's steps, the next frame's
+    # finish() waits for them and swaps the state buffers. The render
+    # thread reads only the front (previous, latest) pair while the worker
+    # writes the back one, and NumPy drops the GIL inside its loops, so a
+    # frame costs about max(simulation, rendering) instead of their sum.
+    # positions and velocities belong to the worker between start() and
+    # finish().
+
+    def __init__(self, positions, velocities):
+        self.positions = positions
+        self.velocities = velocities
+        self.scratch = np.empty_like(positions)
+
+        # Two (previous, latest) pairs, front is the one to draw
+        self.states = [(positions.copy(), positions.copy()) for _ in range(2)]
+        self.front = 0
+
+        self.pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="simulation")
+        self.job = None
+
+    @property
+    def previous(self):
+        return self.states[self.front][0]
+
+    @property
+    def latest(self):
+        return self.states[self.front][1]
+
+    def start(self, steps):
+        self.job = self.pool.submit(self.run, list(steps), self.states[self.front], self.states[1 - self.front])
+
+    def run(self, steps, front, back):
+        if not steps:
+            back[0][:] = front[0]
+            back[1][:] = front[1]
+            return
+
+        for step in steps[:-1]:
+            step_blocks(self.positions, self.velocities, step, self.scratch)
+        back[0][:] = self.positions
+        step_blocks(self.positions, self.velocities, steps[-1], self.scratch)
+        back[1][:] = self.positions
+
+    def finish(self):
+        # Waits for the steps given to start(), their state becomes the front
+        if self.job is not None:
+            self.job.result()
+            self.job = None
+            self.front = 1 - self.front
+
+    def permute(self, order):
+        # Reorders the blocks in every state buffer, only between finish()
+        # and start()
+        for previous, latest in self.states:
+            previous[:] = previous[order]
+            latest[:] = latest[order]
+
+    def delete(self):
+        self.finish()
+        self.pool.shutdown()
+
+
+# Same rules as step_blocks, one vertex per block
+SIM_VERTEX_SHADER_SOURCE = """
+#version 330 core
+layout(location = 0) in vec3 inPos;
+layout(location = 1) in vec3 inVel;
+
+out vec3 outPos;
+out vec3 outVel;
+
+uniform float deltaTime;
+uniform vec3 bounds;
+
+void main() {
+    outPos = inPos + inVel * deltaTime;
+    outVel = mix(inVel, -inVel, greaterThan(abs(outPos), bounds));
+}
+"""
+
+
+class GpuBlockSim:
+    # Advances the blocks with transform feedback, ping-ponging between two
+    # meshes of interleaved (position, velocity). Needs a current GL context.
+
+    def __init__(self, positions, velocities):
+        self.count = len(positions)
+
+        self.program = ShaderProgram(SIM_VERTEX_SHADER_SOURCE, varyings=["outPos", "outVel"])
+        self.delta_time_loc = self.program.uniform_location("deltaTime")
+        self.program.use()
+        glUniform3fv(self.program.uniform_location("bounds"), 1, BOUNDS)
+
+        state = np.empty((self.count, 6), dtype=np.float32)
+        state[:, 0:3] = positions
+        state[:, 3:6] = velocities
+
+        self.meshes = [Mesh(state, (3, 3), usage=GL_DYNAMIC_COPY, mode=GL_POINTS) for _ in range(2)]
+
+        # Index of the mesh holding the latest state
+        self.current = 0
+
+    @property
+    def buffer(self):
+        # Interleaved position/velocity, 6 floats per block
+        return self.meshes[self.current].vbo
+
+    @property
+    def previous_buffer(self):
+        # Same layout, the state one step before
+        return self.meshes[1 - self.current].vbo
+
+    def step(self, delta_time):
+        source = self.meshes[self.current]
+        target = self.meshes[1 - self.current]
+
+        self.program.use()
+        glUniform1f(self.delta_time_loc, delta_time)
+
+        gl_state.enable(GL_RASTERIZER_DISCARD)
+        gl_state.bind_vertex_array(source.vao)
+        gl_state.bind_buffer_base(GL_TRANSFORM_FEEDBACK_BUFFER, 0, target.vbo)
+
+        glBeginTransformFeedback(GL_POINTS)
+        glDrawArrays(GL_POINTS, 0, self.count)
+        glEndTransformFeedback()
+
+        # Unbound so it can be drawn from
+        gl_state.bind_buffer_base(GL_TRANSFORM_FEEDBACK_BUFFER, 0, 0)
+        gl_state.disable(GL_RASTERIZER_DISCARD)
+
+        self.current = 1 - self.current
+
+    def read_back(self):
+        # Copy of the latest state as (positions, velocities), this stalls
+        state = np.empty((self.count, 6), dtype=np.float32)
+        gl_state.bind_buffer(GL_ARRAY_BUFFER, self.buffer)
+        glGetBufferSubData(GL_ARRAY_BUFFER, 0, state.nbytes, state.ctypes.data_as(ctypes.c_void_p))
+        return state[:, 0:3].copy(), state[:, 3:6].copy()
+
+    def delete(self):
+        for mesh in self.meshes:
+            mesh.delete()
+        self.program.delete()
+
+
+def verify_gpu_sim(count=10_000, frames=600, delta_time=1.0 / 60.0, seed=0):
+    # Runs the CPU and GPU simulations side by side from the same start and
+    # returns the largest position and velocity difference. Needs a current
+    # GL context.
+    positions, velocities, _ = spawn_blocks(count, seed)
+    gpu = GpuBlockSim(positions, velocities)
+
+    for _ in range(frames):
+        step_blocks(positions, velocities, delta_time)
+        gpu.step(delta_time)
+
+    gpu_positions, gpu_velocities = gpu.read_back()
+    gpu.delete()
+
+    return np.abs(gpu_positions - positions).max(), np.abs(gpu_velocities - velocities).max()
+
+
+if __name__ == "__main__":
+    # Headless when there is no display or OPENGL_TEST_HEADLESS is set
+    app = App(64, 64, "block_sim")
+
+    position_error, velocity_error = verify_gpu_sim()
+    print(f"{glGetString(GL_RENDERER).decode()}: max position error {position_error:.6g}, max velocity error {velocity_error:.6g}")
+
+    app.close()
+    if position_error > 1e-3 or velocity_error > 1e-3:
+        raise SystemExit("GPU simulation does not match the CPU reference")
\ No newline at end of file
@@ -0,0 +1,132 @@
+import os
+import sys
+import json
+import timeit
+import argparse
+import subprocess
+import glm
+import numpy as np
+
+# Always offscreen, like benchmark.py
+os.environ["OPENGL_TEST_HEADLESS"] = "1"
+
+from renderer import App, Mesh, ShaderProgram, FAST
+from OpenGL import acceleratesupport
+from OpenGL.GL import *
+
+# PyOpenGL reads its flags once, on first import, so every mode is
+# measured in a process of its own started with its environment
+MODES = {
+    "default": {},
+    "fast": {"OPENGL_TEST_FAST": "1"},
+}
+
+VERTEX_SHADER_SOURCE = """
+#version 330 core
+layout(location = 0) in vec3 aPos;
+
+uniform mat4 model;
+uniform float scale;
+
+void main()
+{
+    gl_Position = model * vec4(aPos * scale, 1.0);
+}
+"""
+
+FRAGMENT_SHADER_SOURCE = """
+#version 330 core
+out vec4 FragColor;
+
+void main()
+{
+    FragColor = vec4(1.0);
+}
+"""
+
+
+def measure(number, repeat):
+    # Microseconds per call of the calls the render loops make, in the mode
+    # this process was started in
+    app = App(64, 64, "call-overhead", headless=True)
+    program = ShaderProgram(VERTEX_SHADER_SOURCE, FRAGMENT_SHADER_SOURCE, cache=None)
+    mesh = Mesh(np.zeros(9, dtype=np.float32), (3,))
+    model = program.uniform_location("model")
+    scale = program.uniform_location("scale")
+
+    matrix = glm.mat4(1.0)
+    array = np.eye(4, dtype=np.float32)
+    data = np.zeros(256, dtype=np.float32)
+    buffer = glGenBuffers(1)
+    glBindBuffer(GL_ARRAY_BUFFER, buffer)
+    glBufferData(GL_ARRAY_BUFFER, data.nbytes, None, GL_STREAM_DRAW)
+
+    glUseProgram(program.program)
+    glBindVertexArray(mesh.vao)
+
+    calls = {
+        "glUseProgram": lambda: glUseProgram(program.program),
+        "glBindVertexArray": lambda: glBindVertexArray(mesh.vao),
+        "glBindBuffer": lambda: glBindBuffer(GL_ARRAY_BUFFER, buffer),
+        "glUniform1f": lambda: glUniform1f(scale, 1.0),
+        "glUniformMatrix4fv glm": lambda: glUniformMatrix4fv(model, 1, GL_FALSE, glm.value_ptr(matrix)),
+        "glUniformMatrix4fv array": lambda: glUniformMatrix4fv(model, 1, GL_FALSE, array),
+        "glBufferSubData 1 KiB": lambda: glBufferSubData(GL_ARRAY_BUFFER, 0, data.nbytes, data),
+        "glDrawArrays": lambda: glDrawArrays(GL_TRIANGLES, 0, 3),
+    }
+
+    results = {}
+    for name, call in calls.items():
+        results[name] = min(timeit.repeat(call, number=number, repeat=repeat)) / number * 1e6
+        glFinish()
+
+    glDeleteBuffers(1, np.array([buffer], dtype=np.uint32))
+    mesh.delete()
+    program.delete()
+    app.close()
+    return {"fast": FAST, "accelerate": bool(acceleratesupport.ACCELERATE_AVAILABLE), "calls_us": results}
+
+
+def run(number, repeat):
+    results = {}
+    for mode, environment in MODES.items():
+        env = {key: value for key, value in os.environ.items() if key != "OPENGL_TEST_FAST"}
+        env.update(environment)
+        child = subprocess.run([sys.executable, __file__, "--measure", "--number", str(number), "--repeat", str(repeat)],
+                               env=env, capture_output=True, text=True)
+        if child.returncode != 0:
+            raise RuntimeError(f"{mode} mode failed:\n{child.stderr}")
+        results[mode] = json.loads(child.stdout)
+    return results
+
+
+def report(results):
+    base, new = results["default"], results["fast"]
+    print(f"accelerate: {'yes' if new['accelerate'] else 'not installed'}")
+    print(f"{'call':<28} {'default us':>10} {'fast us':>10} {'change':>8}")
+    for name, old in base["calls_us"].items():
+        now = new["calls_us"][name]
+        print(f"{name:<28} {old:10.3f} {now:10.3f} {(now - old) / old:+8.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-call PyOpenGL overhead, default against fast mode")
+    parser.add_argument("--number", type=int, default=20000, help="calls per timing")
+    parser.add_argument("--repeat", type=int, default=5, help="timings per call, the best is kept")
+    parser.add_argument("-o", "--output", help="also write the JSON results here")
+    parser.add_argument("--measure", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.number, args.repeat)))
+        return
+
+    results = run(args.number, args.repeat)
+    report(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
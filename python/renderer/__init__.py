@@ -0,0 +1,59 @@
+import os
+import sys
+
+# Render offscreen when asked to, or when there is no display to open a
+# window on. PyOpenGL picks its platform on first import, so this has to
+# run before anything imports OpenGL.GL: import renderer first.
+HEADLESS = bool(os.environ.get("OPENGL_TEST_HEADLESS")) or (
+    sys.platform.startswith("linux") and not os.environ.get("DISPLAY") and not os.environ.get("WAYLAND_DISPLAY"))
+
+if HEADLESS:
+    os.environ.setdefault("PYOPENGL_PLATFORM", "egl")
+
+# Fast mode (OPENGL_TEST_FAST=1) drops PyOpenGL's per-call safety nets:
+# the glGetError after every call, error logging, and the silent copy of
+# arrays of the wrong type or layout, which raises instead (everything
+# the renderer passes is already contiguous and of the right type).
+# OpenGL_accelerate does the call wrapping in C when it is installed.
+# Debug mode still checks for errors at every draw.
+FAST = bool(os.environ.get("OPENGL_TEST_FAST"))
+
+if FAST:
+    if "OpenGL.GL" in sys.modules:
+        raise RuntimeError("OPENGL_TEST_FAST needs renderer imported before OpenGL.GL")
+    import OpenGL
+    OpenGL.ERROR_CHECKING = False
+    OpenGL.ERROR_LOGGING = False
+    OpenGL.ERROR_ON_COPY = True
+    OpenGL.USE_ACCELERATE = True
+
+    if HEADLESS:
+        # PyOpenGL's EGL bindings never define their error checker when
+        # checking is off, and fail to import without one
+        from OpenGL.raw.EGL import _errors
+        if not hasattr(_errors, "_error_checker"):
+            _errors._error_checker = None
+
+from .app import App, Scene
+from .atlas import TextureArray, TextureAtlas
+from .camera import Camera, FirstPersonCamera
+from .compressed_texture import CompressedTexture
+from .culling import BVH, frustum_planes
+from .gl_state import GLState, gl_state
+from .geometry import IndexedGeometry, cache_miss_ratio, optimize_vertex_cache, weld
+from .indirect import DrawCommands, multi_draw_indirect_supported
+from .input import Input, InputRecording, key_mask
+from .mesh import Mesh
+from .profiler import Profiler
+from .program_cache import ProgramCache
+from .renderer import Renderer
+from .shader import ShaderProgram, compile_shader
+from .sprite_batch import SpriteBatch
+from .stats import COUNTERS, FrameStats, stats
+from .streaming import StreamingBuffer
+from .texture import Texture
+from .texture_cache import TextureCache, load_image
+from .texture_manager import TextureManager
+from .timestep import FixedTimestep, interpolate
+from .uniform_buffer import UniformBuffer
+from .vertex_format import VertexFormat
\ No newline at end of file
@@ -0,0 +1,187 @@
+import os
+import time
+import numpy as np
+from OpenGL.GL import *
+from .gl_state import gl_state
+from .input import Input, InputRecording
+from .profiler import Profiler
+from .program_cache import default_cache
+from .renderer import Renderer
+from .timestep import FixedTimestep
+
+# Frames a headless run renders when App.run is not given a count
+HEADLESS_FRAMES = int(os.environ.get("OPENGL_TEST_FRAMES", "100"))
+
+# Set to profile every App: a summary is printed each second, and if it
+# names a .csv file the kept frames are written there on close
+PROFILE = os.environ.get("OPENGL_TEST_PROFILE", "")
+
+# Input events are saved to the RECORD file on close, or replayed from the
+# REPLAY file instead of coming from the window
+RECORD = os.environ.get("OPENGL_TEST_RECORD", "")
+REPLAY = os.environ.get("OPENGL_TEST_REPLAY", "")
+
+
+class Scene:
+    # Base for the demos: build GL resources in __init__, then App calls
+    # tick() for every fixed simulation step that is due, update() and
+    # draw() every frame, and delete() on exit. Anything that moves on its
+    # own belongs in tick(); draw() can blend the last two ticks with
+    # app.timestep.alpha. update() gets the real frame time, for input.
+
+    def __init__(self, app):
+        self.app = app
+
+    def tick(self, step):
+        pass
+
+    def update(self, delta_time):
+        pass
+
+    def draw(self, renderer):
+        pass
+
+    def delete(self):
+        pass
+
+
+class App:
+    # Render target + GL context and the main loop shared by every demo.
+    # The target is a GLFW window, or an offscreen framebuffer when headless
+    # (defaults to renderer.HEADLESS). Scenes get input through the App so
+    # the same code runs against either. With profile=True (default from
+    # OPENGL_TEST_PROFILE) every frame is timed by app.profiler. Scenes are
+    # simulated at tick_rate ticks per second, independent of the frame rate.
+
+    def __init__(self, width, height, title, vsync=False, show_fps=False, headless=None, profile=None, tick_rate=None):
+        if headless is None:
+            from . import HEADLESS as headless
+
+        if headless:
+            from .headless import OffscreenTarget
+            self.target = OffscreenTarget(width, height)
+        else:
+            from .window import WindowTarget
+            self.target = WindowTarget(width, height, title, vsync)
+        gl_state.reset()
+
+        self.headless = headless
+        self.title = title
+        self.show_fps = show_fps
+        self.renderer = Renderer()
+
+        if profile is None:
+            profile = bool(PROFILE)
+        self.profiler = Profiler(enabled=profile)
+        self.timestep = FixedTimestep() if tick_rate is None else FixedTimestep(tick_rate)
+
+        self.input = Input()
+        self.target.set_input(self.input)
+        if REPLAY:
+            self.input.replay(InputRecording.load(REPLAY))
+        elif RECORD:
+            self.input.record()
+
+        # Framebuffer size, kept up to date by the resize callback, which
+        # passes it on to every listener(width, height) (attached cameras)
+        self.width, self.height = self.target.framebuffer_size()
+        glViewport(0, 0, self.width, self.height)
+        self.resize_listeners = []
+        self.target.set_resize_callback(self.resize_callback)
+
+        self.last_frame = None
+        self.fps_counter = 0
+        self.fps_timer = time.perf_counter()
+
+    @property
+    def aspect_ratio(self):
+        return self.width / max(self.height, 1)
+
+    def resize_callback(self, width, height):
+        self.width, self.height = width, height
+        glViewport(0, 0, width, height)
+        for listener in self.resize_listeners:
+            listener(width, height)
+
+    # Input, through app.input: only replayed events when headless
+
+    def is_key_pressed(self, key):
+        return self.input.is_pressed(key)
+
+    def set_cursor_pos_callback(self, callback):
+        self.input.cursor_callback = callback
+
+    def set_scroll_callback(self, callback):
+        self.input.scroll_callback = callback
+
+    def capture_cursor(self):
+        self.target.capture_cursor()
+
+    def run(self, scene_class, *args, frames=None, **kwargs):
+        # Runs until the window closes, or for `frames` frames
+        if frames is None and self.headless:
+            frames = HEADLESS_FRAMES
+
+        scene = scene_class(self, *args, **kwargs)
+
+        frame = 0
+        while not self.target.should_close() and (frames is None or frame < frames):
+            self.frame(scene)
+            frame += 1
+
+        scene.delete()
+        self.close()
+
+    def frame(self, scene, delta_time=None):
+        # One iteration of the main loop; delta_time defaults to wall time
+        current_frame = time.perf_counter()
+        if delta_time is None:
+            delta_time = 0.0 if self.last_frame is None else current_frame - self.last_frame
+        self.last_frame = current_frame
+
+        profiler = self.profiler
+        profiler.begin_frame()
+
+        with profiler.phase("input"):
+            self.input.begin_frame()
+            self.target.poll_events()
+        with profiler.phase("simulate"):
+            for _ in range(self.timestep.advance(delta_time)):
+                scene.tick(self.timestep.step)
+            scene.update(delta_time)
+        with profiler.phase("draw"):
+            scene.draw(self.renderer)
+
+        self.fps_counter += 1
+        if current_frame - self.fps_timer >= 1.0:
+            if self.show_fps:
+                self.target.set_title(f"{self.title} - FPS: {self.fps_counter}")
+            if profiler.enabled:
+                print(f"{self.title}: {profiler.summary(self.fps_counter)}")
+            self.fps_counter = 0
+            self.fps_timer = current_frame
+
+        with profiler.phase("swap"):
+            self.target.swap_buffers()
+
+        profiler.end_frame()
+
+    def read_pixels(self):
+        # Last finished frame as a top-down (height, width, 4) RGBA array
+        if not self.headless:
+            glReadBuffer(GL_FRONT)
+        glPixelStorei(GL_PACK_ALIGNMENT, 1)
+        data = glReadPixels(0, 0, self.width, self.height, GL_RGBA, GL_UNSIGNED_BYTE)
+        return np.frombuffer(data, dtype=np.uint8).reshape(self.height, self.width, 4)[::-1]
+
+    def close(self):
+        if self.profiler.enabled:
+            print(f"{self.title}: {self.profiler.summary()}")
+            print(f"{self.title}: {default_cache.summary()}")
+            if PROFILE.endswith(".csv"):
+                self.profiler.to_csv(PROFILE)
+        if RECORD and self.input.recording is not None:
+            self.input.recording.save(RECORD)
+        self.profiler.delete()
+        self.renderer.delete()
+        self.target.close()
\ No newline at end of file
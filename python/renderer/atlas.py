@@ -0,0 +1,103 @@
+import numpy as np
+from OpenGL.GL import *
+from .stats import stats
+from .texture import Texture
+
+# Edge pixels repeated around every atlas image, so filtering and rounding
+# at a region's border never pick up its neighbour
+PADDING = 1
+
+
+def pack_shelves(sizes, width):
+    # Shelf packing of (width, height) rectangles into rows of `width`,
+    # tallest first. Returns their (x, y) corners and the height used.
+    order = sorted(range(len(sizes)), key=lambda index: (-sizes[index][1], -sizes[index][0]))
+    positions = np.zeros((len(sizes), 2), dtype=np.int64)
+
+    x = y = shelf_height = 0
+    for index in order:
+        rectangle_width, rectangle_height = sizes[index]
+        if x + rectangle_width > width:
+            y += shelf_height
+            x = shelf_height = 0
+        positions[index] = x, y
+        x += rectangle_width
+        shelf_height = max(shelf_height, rectangle_height)
+
+    return positions, y + shelf_height
+
+
+class TextureAtlas(Texture):
+    # Many images packed into one 2D texture. images are (height, width, 4)
+    # uint8 arrays, bottom row first as load_image() returns them; image i
+    # is drawn from uvs[i]. Only the top level is kept, mipmaps would blend
+    # neighbouring images together.
+
+    def __init__(self, images, padding=PADDING):
+        super().__init__()
+
+        sizes = [(image.shape[1] + 2 * padding, image.shape[0] + 2 * padding) for image in images]
+        max_size = int(glGetIntegerv(GL_MAX_TEXTURE_SIZE))
+
+        # Start from a square of the total area and widen until it fits
+        area = sum(width * height for width, height in sizes)
+        width = max(max(width for width, _ in sizes), 1 << (int(np.sqrt(area)) - 1).bit_length())
+        while True:
+            positions, height = pack_shelves(sizes, width)
+            if height <= max_size or width >= max_size:
+                break
+            width *= 2
+        if width > max_size or height > max_size:
+            raise RuntimeError(f"{len(images)} images do not fit in a {max_size}x{max_size} atlas")
+
+        pixels = np.zeros((height, width, 4), dtype=np.uint8)
+        self.uvs = np.zeros((len(images), 4), dtype=np.float32)
+        for index, (image, (x, y)) in enumerate(zip(images, positions)):
+            image_height, image_width = image.shape[:2]
+            pixels[y:y + image_height + 2 * padding, x:x + image_width + 2 * padding] = np.pad(
+                image, ((padding, padding), (padding, padding), (0, 0)), mode="edge")
+            x += padding
+            y += padding
+            self.uvs[index] = x / width, y / height, (x + image_width) / width, (y + image_height) / height
+        self.layers = np.zeros(len(images), dtype=np.uint16)
+
+        self.upload([pixels])
+
+    def summary(self):
+        return f"atlas: {len(self.uvs)} images in {self.width}x{self.height}"
+
+
+class TextureArray(Texture):
+    # Many images as the layers of one GL_TEXTURE_2D_ARRAY, image i is layer
+    # i. Layers are as large as the largest image, smaller ones sit in the
+    # corner and uvs[i] covers just them. No padding is needed, layers never
+    # filter into each other.
+
+    target = GL_TEXTURE_2D_ARRAY
+
+    def __init__(self, images):
+        super().__init__()
+
+        if len(images) > glGetIntegerv(GL_MAX_ARRAY_TEXTURE_LAYERS):
+            raise RuntimeError(f"{len(images)} images are more than the texture array layers")
+
+        height = max(image.shape[0] for image in images)
+        width = max(image.shape[1] for image in images)
+        pixels = np.zeros((len(images), height, width, 4), dtype=np.uint8)
+        self.uvs = np.zeros((len(images), 4), dtype=np.float32)
+        for index, image in enumerate(images):
+            image_height, image_width = image.shape[:2]
+            pixels[index, :image_height, :image_width] = image
+            self.uvs[index] = 0.0, 0.0, image_width / width, image_height / height
+        self.layers = np.arange(len(images), dtype=np.uint16)
+
+        glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_MAX_LEVEL, 0)
+        glTexImage3D(GL_TEXTURE_2D_ARRAY, 0, GL_RGBA8, width, height, len(images), 0, GL_RGBA, GL_UNSIGNED_BYTE, pixels)
+        stats.bytes_uploaded += pixels.nbytes
+
+        self.width = width
+        self.height = height
+        self.ready = True
+
+    def summary(self):
+        return f"texture array: {len(self.uvs)} layers of {self.width}x{self.height}"
\ No newline at end of file
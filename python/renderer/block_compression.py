@@ -0,0 +1,317 @@
+import numpy as np
+from OpenGL.GL import *
+from .gl_state import gl_state
+
+# CPU decoders for BC1, BC3 and BC7 blocks, used when the driver cannot
+# sample a compressed format. Every decoder takes (n, block size) uint8
+# blocks and returns (n, 4, 4, 4) RGBA8 texels, rows in the order they are
+# stored.
+
+BC1_BLOCK_SIZE = 8
+BC3_BLOCK_SIZE = 16
+BC7_BLOCK_SIZE = 16
+
+
+def decode_rgb565(colors):
+    # (n,) uint16 -> (n, 3) int32, bits replicated into the low bits
+    colors = colors.astype(np.int32)
+    red = colors >> 11 & 31
+    green = colors >> 5 & 63
+    blue = colors & 31
+    return np.stack([red << 3 | red >> 2, green << 2 | green >> 4, blue << 3 | blue >> 2], axis=1)
+
+
+def decode_bc1(blocks, four_colors=False):
+    # four_colors forces the 4-color mode, as the color half of BC3 does
+    c0 = blocks[:, 0].astype(np.uint16) | blocks[:, 1].astype(np.uint16) << 8
+    c1 = blocks[:, 2].astype(np.uint16) | blocks[:, 3].astype(np.uint16) << 8
+    rgb0 = decode_rgb565(c0)
+    rgb1 = decode_rgb565(c1)
+
+    palette = np.zeros((len(blocks), 4, 4), dtype=np.int32)
+    palette[:, 0, :3] = rgb0
+    palette[:, 1, :3] = rgb1
+    palette[:, :3, 3] = 255
+
+    # c0 <= c1 swaps the last two for the midpoint and transparent black
+    four = (c0 > c1) | four_colors
+    palette[:, 2, :3] = np.where(four[:, None], (2 * rgb0 + rgb1 + 1) // 3, (rgb0 + rgb1 + 1) // 2)
+    palette[:, 3, :3] = np.where(four[:, None], (rgb0 + 2 * rgb1 + 1) // 3, 0)
+    palette[:, 3, 3] = np.where(four, 255, 0)
+
+    indices = np.unpackbits(blocks[:, 4:8], axis=1, bitorder="little").reshape(-1, 16, 2)
+    indices = indices[..., 0] | indices[..., 1] << 1
+    texels = np.take_along_axis(palette, indices[..., None].astype(np.intp), axis=1)
+    return texels.astype(np.uint8).reshape(-1, 4, 4, 4)
+
+
+def decode_bc3(blocks):
+    a0 = blocks[:, 0].astype(np.int32)
+    a1 = blocks[:, 1].astype(np.int32)
+
+    # 8 alphas between the endpoints, or 6 plus 0 and 255
+    steps = np.arange(1, 7)
+    palette = np.zeros((len(blocks), 8), dtype=np.int32)
+    palette[:, 0] = a0
+    palette[:, 1] = a1
+    eight = a0 > a1
+    palette[:, 2:8] = np.where(eight[:, None],
+                               ((7 - steps) * a0[:, None] + steps * a1[:, None] + 3) // 7,
+                               np.concatenate([((5 - steps[:4]) * a0[:, None] + steps[:4] * a1[:, None] + 2) // 5,
+                                               np.zeros((len(blocks), 1), dtype=np.int32),
+                                               np.full((len(blocks), 1), 255, dtype=np.int32)], axis=1))
+
+    indices = np.unpackbits(blocks[:, 2:8], axis=1, bitorder="little").reshape(-1, 16, 3)
+    indices = indices[..., 0] | indices[..., 1] << 1 | indices[..., 2] << 2
+    alpha = np.take_along_axis(palette, indices.astype(np.intp), axis=1)
+
+    texels = decode_bc1(blocks[:, 8:16], four_colors=True)
+    texels[..., 3] = alpha.reshape(-1, 4, 4)
+    return texels
+
+
+# Per mode: subsets, partition bits, rotation bits, index selection bits,
+# color bits, alpha bits, per-endpoint p-bits, shared p-bits, index bits,
+# secondary index bits
+BC7_MODES = [
+    (3, 4, 0, 0, 4, 0, 1, 0, 3, 0),
+    (2, 6, 0, 0, 6, 0, 0, 1, 3, 0),
+    (3, 6, 0, 0, 5, 0, 0, 0, 2, 0),
+    (2, 6, 0, 0, 7, 0, 1, 0, 2, 0),
+    (1, 0, 2, 1, 5, 6, 0, 0, 2, 3),
+    (1, 0, 2, 0, 7, 8, 0, 0, 2, 2),
+    (1, 0, 0, 0, 7, 7, 1, 0, 4, 0),
+    (2, 6, 0, 0, 5, 5, 1, 0, 2, 0),
+]
+
+BC7_WEIGHTS = {
+    2: np.array([0, 21, 43, 64]),
+    3: np.array([0, 9, 18, 27, 37, 46, 55, 64]),
+    4: np.array([0, 4, 9, 13, 17, 21, 26, 30, 34, 38, 43, 47, 51, 55, 60, 64]),
+}
+
+# Subset of each texel, by partition, for 2 and 3 subsets
+BC7_PARTITIONS_2 = np.array([[int(c) for c in row] for row in """
+0011001100110011 0001000100010001 0111011101110111 0001001100110111 0000000100010011 0011011101111111 0001001101111111 0000000100110111
+0000000000010011 0011011111111111 0000000101111111 0000000000010111 0001011111111111 0000000011111111 0000111111111111 0000000000001111
+0000100011101111 0111000100000000 0000000010001110 0111001100010000 0011000100000000 0000100011001110 0000000010001100 0111001100110001
+0011000100010000 0000100010001100 0110011001100110 0011011001101100 0001011111101000 0000111111110000 0111000110001110 0011100110011100
+0101010101010101 0000111100001111 0101101001011010 0011001111001100 0011110000111100 0101010110101010 0110100101101001 0101101010100101
+0111001111001110 0001001111001000 0011001001001100 0011101111011100 0110100110010110 0011110011000011 0110011010011001 0000011001100000
+0100111001000000 0010011100100000 0000001001110010 0000010011100100 0110110010010011 0011011011001001 0110001110011100 0011100111000110
+0110110011001001 0110001100111001 0111111010000001 0001100011100111 0000111100110011 0011001111110000 0010001011101110 0100010001110111
+""".split()])
+
+BC7_PARTITIONS_3 = np.array([[int(c) for c in row] for row in """
+0011001102212222 0001001122112221 0000200122112211 0222002200110111 0000000011221122 0011001100220022 0022002211111111 0011001122112211
+0000000011112222 0000111111112222 0000111122222222 0012001200120012 0112011201120112 0122012201220122 0011011211221222 0011200122002220
+0001001101121122 0111001120012200 0000112211221122 0022002200221111 0111011102220222 0001000122212221 0000001101220122 0000110022102210
+0122012200110000 0012001211222222 0110122112210110 0000011012211221 0022110211020022 0110011020022222 0011012201220011 0000200022112221
+0000000211221222 0222002200120011 0011001200220222 0120012001200120 0000111122220000 0120120120120120 0120201212010120 0011220011220011
+0011112222000011 0101010122222222 0000000021212121 0022112200221122 0022001100220011 0220122102201221 0101222222220101 0000212121212121
+0101010101012222 0222011102220111 0002111200021112 0000211221122112 0222011101110222 0002111211120002 0110011001102222 0000000021122112
+0110011022222222 0022001100110022 0022112211220022 0000000000002112 0002000100020001 0222122202221222 0101222222222222 0111201122012220
+""".split()])
+
+# Anchor texel of subset 1 (2 subsets), subsets 1 and 2 (3 subsets)
+BC7_ANCHORS_2 = np.array([
+    15, 15, 15, 15, 15, 15, 15, 15, 15, 15, 15, 15, 15, 15, 15, 15,
+    15, 2, 8, 2, 2, 8, 8, 15, 2, 8, 2, 2, 8, 8, 2, 2,
+    15, 15, 6, 8, 2, 8, 15, 15, 2, 8, 2, 2, 2, 15, 15, 6,
+    6, 2, 6, 8, 15, 15, 2, 2, 15, 15, 15, 15, 15, 2, 2, 15,
+])
+BC7_ANCHORS_3 = np.array([[
+    3, 3, 15, 15, 8, 3, 15, 15, 8, 8, 6, 6, 6, 5, 3, 3,
+    3, 3, 8, 15, 3, 3, 6, 10, 5, 8, 8, 6, 8, 5, 15, 15,
+    8, 15, 3, 5, 6, 10, 8, 15, 15, 3, 15, 5, 15, 15, 15, 15,
+    3, 15, 5, 5, 5, 8, 5, 10, 5, 10, 8, 13, 15, 12, 3, 3,
+], [
+    15, 8, 8, 3, 15, 15, 3, 8, 15, 15, 15, 15, 15, 15, 15, 8,
+    15, 8, 15, 3, 15, 8, 15, 8, 3, 15, 6, 10, 15, 15, 10, 8,
+    15, 3, 15, 10, 10, 8, 9, 10, 6, 15, 8, 15, 3, 6, 6, 8,
+    15, 3, 15, 15, 15, 15, 15, 15, 15, 15, 15, 15, 3, 15, 15, 8,
+]])
+
+
+class BitReader:
+    # Consecutive little-endian bit fields of many blocks at once
+    def __init__(self, bits, position):
+        self.bits = bits
+        self.position = position
+
+    def read(self, count):
+        if count == 0:
+            return np.zeros(len(self.bits), dtype=np.int32)
+        field = self.bits[:, self.position:self.position + count].astype(np.int32)
+        self.position += count
+        return field @ (1 << np.arange(count, dtype=np.int32))
+
+
+def expand_bits(values, bits):
+    # Replicates the top bits into the low ones to fill 8
+    return values << (8 - bits) | values >> (2 * bits - 8)
+
+
+def decode_bc7_mode(bits, mode):
+    subsets, partition_bits, rotation_bits, selection_bits, color_bits, alpha_bits, \
+        endpoint_pbits, shared_pbits, index_bits, index_bits_2 = BC7_MODES[mode]
+    texels = np.zeros((len(bits), 16, 4), dtype=np.int32)
+
+    header = BitReader(bits, mode + 1)
+    partitions = header.read(partition_bits)
+    rotations = header.read(rotation_bits)
+    selections = header.read(selection_bits)
+
+    # Endpoints are stored channel by channel, every endpoint of a channel together
+    endpoints = np.zeros((len(bits), 2 * subsets, 4), dtype=np.int32)
+    for channel in range(3):
+        for endpoint in range(2 * subsets):
+            endpoints[:, endpoint, channel] = header.read(color_bits)
+    for endpoint in range(2 * subsets):
+        endpoints[:, endpoint, 3] = header.read(alpha_bits)
+
+    if endpoint_pbits or shared_pbits:
+        if endpoint_pbits:
+            pbits = np.stack([header.read(1) for _ in range(2 * subsets)], axis=1)
+        else:
+            pbits = np.repeat(np.stack([header.read(1) for _ in range(subsets)], axis=1), 2, axis=1)
+        endpoints = endpoints << 1 | pbits[:, :, None]
+        color_bits += 1
+        if alpha_bits:
+            alpha_bits += 1
+
+    endpoints[..., :3] = expand_bits(endpoints[..., :3], color_bits)
+    endpoints[..., 3] = expand_bits(endpoints[..., 3], alpha_bits) if alpha_bits else 255
+
+    # Index fields are shorter for anchor texels, which depend on the
+    # partition: read them one partition at a time
+    for partition in np.unique(partitions):
+        selected = partitions == partition
+        if subsets == 1:
+            subset = np.zeros(16, dtype=np.intp)
+            anchors = [0]
+        elif subsets == 2:
+            subset = BC7_PARTITIONS_2[partition]
+            anchors = [0, BC7_ANCHORS_2[partition]]
+        else:
+            subset = BC7_PARTITIONS_3[partition]
+            anchors = [0, *BC7_ANCHORS_3[:, partition]]
+
+        reader = BitReader(bits[selected], header.position)
+        indices = np.stack([reader.read(index_bits - (texel in anchors)) for texel in range(16)], axis=1)
+        if index_bits_2:
+            indices_2 = np.stack([reader.read(index_bits_2 - (texel == 0)) for texel in range(16)], axis=1)
+
+        # Color and alpha weights; modes 4 and 5 keep a second index set
+        # for alpha, mode 4 can swap the two
+        color_weights = BC7_WEIGHTS[index_bits][indices]
+        alpha_weights = color_weights
+        if index_bits_2:
+            alpha_weights = BC7_WEIGHTS[index_bits_2][indices_2]
+            swap = (selections[selected] == 1)[:, None]
+            color_weights, alpha_weights = np.where(swap, alpha_weights, color_weights), np.where(swap, color_weights, alpha_weights)
+
+        low = endpoints[selected][:, 2 * subset]
+        high = endpoints[selected][:, 2 * subset + 1]
+        weights = np.concatenate([np.repeat(color_weights[..., None], 3, axis=2), alpha_weights[..., None]], axis=2)
+        texels[selected] = ((64 - weights) * low + weights * high + 32) >> 6
+
+    # Rotation swaps alpha with red, green or blue after interpolation
+    for rotation in range(1, 4):
+        rotated = rotations == rotation
+        texels[rotated] = texels[rotated][..., [3 if channel == rotation - 1 else rotation - 1 if channel == 3 else channel
+                                                 for channel in range(4)]]
+
+    return texels
+
+
+def decode_bc7(blocks):
+    bits = np.unpackbits(blocks, axis=1, bitorder="little")
+
+    # The mode is the position of the first set bit; blocks without one are
+    # reserved and decode to transparent black
+    modes = np.argmax(bits[:, :8], axis=1)
+    modes[bits[:, :8].max(axis=1) == 0] = 8
+
+    texels = np.zeros((len(blocks), 16, 4), dtype=np.int32)
+    for mode in np.unique(modes):
+        if mode < 8:
+            selected = modes == mode
+            texels[selected] = decode_bc7_mode(bits[selected], mode)
+    return texels.astype(np.uint8).reshape(-1, 4, 4, 4)
+
+
+DECODERS = {
+    "BC1": (BC1_BLOCK_SIZE, decode_bc1),
+    "BC3": (BC3_BLOCK_SIZE, decode_bc3),
+    "BC7": (BC7_BLOCK_SIZE, decode_bc7),
+}
+
+
+def decompress_level(data, width, height, format):
+    # One compressed mip level to (height, width, 4) RGBA8 texels
+    block_size, decoder = DECODERS[format]
+    blocks_wide = max(1, (width + 3) // 4)
+    blocks_high = max(1, (height + 3) // 4)
+    blocks = np.frombuffer(data, dtype=np.uint8, count=blocks_wide * blocks_high * block_size)
+    texels = decoder(blocks.reshape(-1, block_size)).reshape(blocks_high, blocks_wide, 4, 4, 4)
+    texels = texels.transpose(0, 2, 1, 3, 4).reshape(blocks_high * 4, blocks_wide * 4, 4)
+    return np.ascontiguousarray(texels[:height, :width])
+
+
+def random_blocks(format, count, rng):
+    # Random bytes hit both BC1 and BC3 colour orders and both BC3 alpha
+    # orders. BC7 gets its mode bits forced so every mode (and the reserved
+    # one) shows up.
+    block_size, _ = DECODERS[format]
+    blocks = rng.integers(0, 256, (count, block_size), dtype=np.uint8)
+    if format == "BC7":
+        modes = np.arange(count) % 9
+        high = blocks[:, 0] & (0xFE << np.minimum(modes, 7)).astype(np.uint8)
+        blocks[:, 0] = np.where(modes < 8, high | (1 << np.minimum(modes, 7)), 0)
+    return blocks
+
+
+def verify_block_compression(blocks_wide=32, blocks_high=32, seed=0):
+    # Uploads random blocks of every format the driver samples, reads the
+    # driver's decoding back and returns the largest difference from
+    # decompress_level per format. Needs a current GL context.
+    from .compressed_texture import COMPRESSED_FORMATS, compressed_formats
+
+    rng = np.random.default_rng(seed)
+    width, height = blocks_wide * 4, blocks_high * 4
+    errors = {}
+
+    texture = glGenTextures(1)
+    gl_state.bind_texture(GL_TEXTURE_2D, texture)
+    glPixelStorei(GL_PACK_ALIGNMENT, 1)
+    for format in sorted(compressed_formats()):
+        data = random_blocks(format, blocks_wide * blocks_high, rng).reshape(-1)
+        glCompressedTexImage2D(GL_TEXTURE_2D, 0, COMPRESSED_FORMATS[format][0], width, height, 0, data)
+        pixels = glGetTexImage(GL_TEXTURE_2D, 0, GL_RGBA, GL_UNSIGNED_BYTE)
+        driver = np.frombuffer(pixels, dtype=np.uint8).reshape(height, width, 4)
+
+        expected = decompress_level(data, width, height, format)
+        errors[format] = int(np.abs(driver.astype(np.int32) - expected).max())
+    gl_state.delete_texture(texture)
+
+    return errors
+
+
+# Decoders may round differently from the driver by this much per channel
+TOLERANCES = {"BC1": 2, "BC3": 2, "BC7": 0}
+
+
+if __name__ == "__main__":
+    from .app import App
+
+    # Headless when there is no display or OPENGL_TEST_HEADLESS is set
+    app = App(64, 64, "block_compression")
+
+    errors = verify_block_compression()
+    for format, error in errors.items():
+        print(f"{glGetString(GL_RENDERER).decode()}: {format} max error {error}")
+
+    app.close()
+    if any(error > TOLERANCES[format] for format, error in errors.items()):
+        raise SystemExit("CPU block decoders do not match the driver")
\ No newline at end of file
@@ -0,0 +1,210 @@
+import math
+import glfw
+import glm
+import numpy as np
+from .culling import frustum_planes
+from .input import key_mask
+
+
+FORWARD_KEYS = key_mask(glfw.KEY_W)
+BACKWARD_KEYS = key_mask(glfw.KEY_S)
+LEFT_KEYS = key_mask(glfw.KEY_A)
+RIGHT_KEYS = key_mask(glfw.KEY_D)
+DOWN_KEYS = key_mask(glfw.KEY_LEFT_SHIFT, glfw.KEY_RIGHT_SHIFT)
+UP_KEYS = key_mask(glfw.KEY_SPACE)
+MOVE_KEYS = FORWARD_KEYS | BACKWARD_KEYS | LEFT_KEYS | RIGHT_KEYS | DOWN_KEYS | UP_KEYS
+
+
+class Camera:
+    # Perspective camera that keeps its matrices between frames. Setting the
+    # position, direction, fov or aspect ratio marks the view or projection
+    # stale; they, the view-projection, its frustum planes and the upload
+    # buffer are rebuilt on the next read and reused until then. Assign
+    # position/front rather than changing their components in place.
+
+    def __init__(self, position=glm.vec3(0.0, 0.0, 0.0), front=glm.vec3(0.0, 0.0, -1.0), fov=90.0, near=0.1, far=1000.0, aspect_ratio=1.0):
+        self.up = glm.vec3(0.0, 1.0, 0.0)
+        self._position = glm.vec3(position)
+        self._front = glm.vec3(front)
+        self._fov = fov
+        self._aspect_ratio = aspect_ratio
+        self.near = near
+        self.far = far
+
+        # Bumped on every change, lets the renderer skip re-uploads
+        self.version = 0
+
+        self._view = None
+        self._projection = None
+        self._view_projection = None
+        self._planes = None
+        self._buffer = np.zeros((2, 4, 4), dtype=np.float32)
+        self._buffer_version = -1
+
+    def attach(self, app):
+        # Follows the app's framebuffer size from now on
+        self.resize(app.width, app.height)
+        app.resize_listeners.append(self.resize)
+
+    def resize(self, width, height):
+        aspect_ratio = width / max(height, 1)
+        if aspect_ratio != self._aspect_ratio:
+            self._aspect_ratio = aspect_ratio
+            self.invalidate_projection()
+
+    def zoom(self, amount):
+        # Narrows the fov by amount degrees, as a scroll wheel would
+        self.fov = max(1.0, min(180.0, self._fov - amount))
+
+    def invalidate_view(self):
+        self._view = None
+        self._view_projection = None
+        self._planes = None
+        self.version += 1
+
+    def invalidate_projection(self):
+        self._projection = None
+        self._view_projection = None
+        self._planes = None
+        self.version += 1
+
+    @property
+    def position(self):
+        return self._position
+
+    @position.setter
+    def position(self, position):
+        self._position = glm.vec3(position)
+        self.invalidate_view()
+
+    @property
+    def front(self):
+        return self._front
+
+    @front.setter
+    def front(self, front):
+        self._front = glm.vec3(front)
+        self.invalidate_view()
+
+    @property
+    def fov(self):
+        return self._fov
+
+    @fov.setter
+    def fov(self, fov):
+        if fov != self._fov:
+            self._fov = fov
+            self.invalidate_projection()
+
+    @property
+    def aspect_ratio(self):
+        return self._aspect_ratio
+
+    @property
+    def view(self):
+        if self._view is None:
+            self._view = glm.lookAt(self._position, self._position + self._front, self.up)
+        return self._view
+
+    @property
+    def projection(self):
+        if self._projection is None:
+            self._projection = glm.perspective(glm.radians(self._fov), self._aspect_ratio, self.near, self.far)
+        return self._projection
+
+    @property
+    def view_projection(self):
+        if self._view_projection is None:
+            self._view_projection = self.projection * self.view
+        return self._view_projection
+
+    @property
+    def planes(self):
+        # Frustum planes for BVH.cull
+        if self._planes is None:
+            self._planes = frustum_planes(self.view_projection)
+        return self._planes
+
+    @property
+    def buffer(self):
+        # float32 projection then view, column-major: the Camera block's layout
+        if self._buffer_version != self.version:
+            self._buffer[0] = np.frombuffer(self.projection.to_bytes(), dtype=np.float32).reshape(4, 4)
+            self._buffer[1] = np.frombuffer(self.view.to_bytes(), dtype=np.float32).reshape(4, 4)
+            self._buffer_version = self.version
+        return self._buffer
+
+
+class FirstPersonCamera(Camera):
+    # Mouse-look + WASD camera used by the FPV demos. Movement stays on the
+    # ground plane, shift/space move down/up.
+
+    def __init__(self, position=glm.vec3(0.0, 0.0, 3.0), yaw=-90.0, pitch=0.0, fov=90.0, speed=10.0, sensitivity=0.1):
+        super().__init__(position, fov=fov)
+        self.yaw = yaw
+        self.pitch = pitch
+        self.speed = speed
+        self.sensitivity = sensitivity
+
+        self.first_mouse = True
+        self.last_x = 0.0
+        self.last_y = 0.0
+
+        # Ground-plane basis for movement, only changes with yaw and pitch
+        self.look(yaw, pitch)
+
+    def attach(self, app):
+        super().attach(app)
+        app.capture_cursor()
+        app.set_cursor_pos_callback(self.mouse_callback)
+
+    def mouse_callback(self, xpos, ypos):
+        if self.first_mouse:
+            self.last_x = xpos
+            self.last_y = ypos
+            self.first_mouse = False
+
+        xoffset = (xpos - self.last_x) * self.sensitivity
+        yoffset = (self.last_y - ypos) * self.sensitivity  # reversed
+        self.last_x = xpos
+        self.last_y = ypos
+
+        self.look(self.yaw + xoffset, self.pitch + yoffset)
+
+    def look(self, yaw, pitch):
+        # Points the camera, pitch is clamped short of straight up/down
+        self.yaw = yaw
+        self.pitch = max(-89.0, min(89.0, pitch))
+
+        front = glm.vec3()
+        front.x = math.cos(glm.radians(self.yaw)) * math.cos(glm.radians(self.pitch))
+        front.y = math.sin(glm.radians(self.pitch))
+        front.z = math.sin(glm.radians(self.yaw)) * math.cos(glm.radians(self.pitch))
+        self.front = glm.normalize(front)
+
+        self.flat_front = glm.normalize(glm.vec3(self.front.x, 0.0, self.front.z))
+        self.flat_right = glm.normalize(glm.cross(self.flat_front, self.up))
+
+    def process_input(self, app, delta_time):
+        keys = app.input.keys
+        if not keys & MOVE_KEYS:
+            return
+
+        camera_speed = self.speed * delta_time
+        position = glm.vec3(self._position)
+
+        if keys & FORWARD_KEYS:
+            position += self.flat_front * camera_speed
+        if keys & BACKWARD_KEYS:
+            position -= self.flat_front * camera_speed
+        if keys & LEFT_KEYS:
+            position -= self.flat_right * camera_speed
+        if keys & RIGHT_KEYS:
+            position += self.flat_right * camera_speed
+
+        if keys & DOWN_KEYS:
+            position -= self.up * camera_speed
+        if keys & UP_KEYS:
+            position += self.up * camera_speed
+
+        self.position = position
\ No newline at end of file
@@ -0,0 +1,124 @@
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.GL.EXT.texture_compression_s3tc import GL_COMPRESSED_RGBA_S3TC_DXT1_EXT, GL_COMPRESSED_RGBA_S3TC_DXT5_EXT
+from .block_compression import DECODERS, decompress_level
+from .gl_state import gl_state
+from .stats import stats
+from .texture import Texture
+
+# Block formats: GL internal format and the extensions that let GL sample
+# it (any one of them). Anything else is decompressed on the CPU.
+COMPRESSED_FORMATS = {
+    "BC1": (GL_COMPRESSED_RGBA_S3TC_DXT1_EXT, ("GL_EXT_texture_compression_s3tc", "GL_EXT_texture_compression_dxt1")),
+    "BC3": (GL_COMPRESSED_RGBA_S3TC_DXT5_EXT, ("GL_EXT_texture_compression_s3tc",)),
+    "BC7": (GL_COMPRESSED_RGBA_BPTC_UNORM, ("GL_ARB_texture_compression_bptc",)),
+}
+
+# DDS FourCCs and DX10 DXGI formats, KTX2 VkFormats
+DDS_FOURCCS = {b"DXT1": "BC1", b"DXT5": "BC3"}
+DXGI_FORMATS = {71: "BC1", 77: "BC3", 98: "BC7"}
+VK_FORMATS = {133: "BC1", 137: "BC3", 145: "BC7"}
+
+DDS_MAGIC = b"DDS "
+KTX2_IDENTIFIER = b"\xabKTX 20\xbb\r\n\x1a\n"
+
+
+def level_size(width, height, format):
+    return max(1, (width + 3) // 4) * max(1, (height + 3) // 4) * DECODERS[format][0]
+
+
+def read_dds(data):
+    # (format, width, height, [level bytes]) of a .dds file
+    header = data[4:128].view("<u4")
+    height, width, level_count = int(header[2]), int(header[3]), max(1, int(header[6]))
+    fourcc = bytes(data[84:88])
+    offset = 128
+    if fourcc == b"DX10":
+        dxgi_format = int(data[128:132].view("<u4")[0])
+        if dxgi_format not in DXGI_FORMATS:
+            raise RuntimeError(f"Unsupported DXGI format {dxgi_format}")
+        format = DXGI_FORMATS[dxgi_format]
+        offset = 148
+    elif fourcc in DDS_FOURCCS:
+        format = DDS_FOURCCS[fourcc]
+    else:
+        raise RuntimeError(f"Unsupported DDS format {fourcc!r}")
+
+    levels = []
+    for level in range(level_count):
+        size = level_size(max(1, width >> level), max(1, height >> level), format)
+        levels.append(data[offset:offset + size])
+        offset += size
+    return format, width, height, levels
+
+
+def read_ktx2(data):
+    # (format, width, height, [level bytes]) of a .ktx2 file
+    header = data[12:48].view("<u4")
+    vk_format, width, height = int(header[0]), int(header[2]), int(header[3])
+    level_count, supercompression = max(1, int(header[7])), int(header[8])
+    if vk_format not in VK_FORMATS:
+        raise RuntimeError(f"Unsupported KTX2 format {vk_format}")
+    if supercompression:
+        raise RuntimeError("Supercompressed KTX2 files are not supported")
+    if header[4] > 1 or header[5] > 1 or header[6] > 1:
+        raise RuntimeError("Only 2D KTX2 textures are supported")
+
+    # Level index: byte offset, byte length, uncompressed length
+    index = data[80:80 + 24 * level_count].view("<u8").reshape(level_count, 3)
+    levels = [data[int(offset):int(offset + length)] for offset, length, _ in index]
+    return VK_FORMATS[vk_format], width, height, levels
+
+
+def read_compressed(path):
+    # Mapped, so only the levels that get uploaded are read from disk
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+    if bytes(data[:4]) == DDS_MAGIC:
+        return read_dds(data)
+    if bytes(data[:12]) == KTX2_IDENTIFIER:
+        return read_ktx2(data)
+    raise RuntimeError(f"{path} is neither a DDS nor a KTX2 file")
+
+
+def compressed_formats():
+    # Block formats the current context can sample
+    extensions = {glGetStringi(GL_EXTENSIONS, index).decode() for index in range(glGetIntegerv(GL_NUM_EXTENSIONS))}
+    return {format for format, (_, required) in COMPRESSED_FORMATS.items() if extensions.intersection(required)}
+
+
+class CompressedTexture(Texture):
+    # 2D texture from a block-compressed DDS or KTX2 file (BC1, BC3 or BC7)
+    # with every mip level it holds. Uploaded as is with
+    # glCompressedTexImage2D, or decompressed to RGBA8 on the CPU when the
+    # driver lacks the format (or decompress=True). Both containers store
+    # the top row first, so uvs flip v.
+
+    uvs = np.array([[0.0, 1.0, 1.0, 0.0]], dtype=np.float32)
+
+    # Filled on first use, the formats do not change for a context
+    supported = None
+
+    def __init__(self, path, decompress=False):
+        super().__init__()
+
+        self.format, width, height, levels = read_compressed(path)
+
+        if CompressedTexture.supported is None:
+            CompressedTexture.supported = compressed_formats()
+        self.compressed = not decompress and self.format in CompressedTexture.supported
+
+        if not self.compressed:
+            self.upload([decompress_level(data, max(1, width >> level), max(1, height >> level), self.format)
+                         for level, data in enumerate(levels)])
+            return
+
+        gl_state.bind_texture(GL_TEXTURE_2D, self.texture)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAX_LEVEL, len(levels) - 1)
+        internal_format = COMPRESSED_FORMATS[self.format][0]
+        for level, data in enumerate(levels):
+            glCompressedTexImage2D(GL_TEXTURE_2D, level, internal_format, max(1, width >> level), max(1, height >> level), 0, data)
+            stats.bytes_uploaded += data.nbytes
+
+        self.width = width
+        self.height = height
+        self.ready = True
\ No newline at end of file
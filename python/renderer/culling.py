@@ -0,0 +1,148 @@
+import numpy as np
+from .stats import stats
+
+# Items per BVH leaf, the unit that is culled and drawn
+LEAF_SIZE = 32
+
+# A refit tree is rebuilt once its leaves cover this much more surface
+# than right after the build, moving items make refit leaves sprawl
+REBUILD_GROWTH = 2.0
+
+
+def frustum_planes(matrix):
+    # The 6 planes (a, b, c, d) of a projection * view matrix, normals point
+    # inwards: a point p is inside when a*x + b*y + c*z + d >= 0 for all
+    rows = np.array(matrix, dtype=np.float64)
+    planes = np.array([
+        rows[3] + rows[0], rows[3] - rows[0],
+        rows[3] + rows[1], rows[3] - rows[1],
+        rows[3] + rows[2], rows[3] - rows[2],
+    ])
+    return planes / np.linalg.norm(planes[:, :3], axis=1, keepdims=True)
+
+
+class BVH:
+    # Bounding volume hierarchy over item boxes (center +- half extent) for
+    # frustum culling. Items are reordered once at build (`order`) so every
+    # leaf is a contiguous range of LEAF_SIZE items: callers store their
+    # data in that order and draw visible leaves as a few (first, count)
+    # ranges. The tree is an implicit complete binary tree over the leaves,
+    # node i has children 2i and 2i + 1, so refit() just recomputes the
+    # bounds level by level when the items move.
+
+    def __init__(self, centers, extents, leaf_size=LEAF_SIZE):
+        centers = np.asarray(centers, dtype=np.float32)
+        self.count = len(centers)
+        self.leaf_size = leaf_size
+        self.extents = np.broadcast_to(np.asarray(extents, dtype=np.float32), centers.shape)
+
+        leaves = max(1, -(-self.count // leaf_size))
+        self.leaves = 1 << (leaves - 1).bit_length()
+        self.depth = self.leaves.bit_length() - 1
+
+        # Bounds of node i at index i, index 0 unused
+        self.mins = np.empty((2 * self.leaves, 3), dtype=np.float32)
+        self.maxs = np.empty((2 * self.leaves, 3), dtype=np.float32)
+
+        self.order = np.arange(self.count)
+        self.split(centers, 0, self.leaves)
+        self.extents = np.ascontiguousarray(self.extents[self.order])
+
+        self.refit(centers[self.order])
+        self.built_area = self.leaf_area()
+
+    def split(self, centers, first_leaf, end_leaf):
+        # Median split of the items of leaves [first_leaf, end_leaf) along
+        # their longest axis, recursing until a node is a single leaf
+        if end_leaf - first_leaf == 1:
+            return
+
+        start = first_leaf * self.leaf_size
+        end = min(end_leaf * self.leaf_size, self.count)
+        middle_leaf = (first_leaf + end_leaf) // 2
+        middle = middle_leaf * self.leaf_size
+
+        if start < middle < end:
+            items = self.order[start:end]
+            points = centers[items]
+            axis = np.argmax(points.max(axis=0) - points.min(axis=0))
+            self.order[start:end] = items[np.argpartition(points[:, axis], middle - start)]
+
+        self.split(centers, first_leaf, middle_leaf)
+        self.split(centers, middle_leaf, end_leaf)
+
+    def refit(self, centers):
+        # New bounds for items that moved, centers in tree order. Leaves
+        # are padded with copies of the last item, ranges past the end of
+        # the items are clipped off in cull()
+        if self.count == 0:
+            # Nothing to bound, an inverted box is never visible
+            self.mins[:] = np.inf
+            self.maxs[:] = -np.inf
+            return
+
+        padding = ((0, self.leaves * self.leaf_size - self.count), (0, 0))
+        lows = np.pad(centers - self.extents, padding, mode="edge")
+        highs = np.pad(centers + self.extents, padding, mode="edge")
+
+        leaves = self.leaves
+        self.mins[leaves:] = lows.reshape(leaves, self.leaf_size, 3).min(axis=1)
+        self.maxs[leaves:] = highs.reshape(leaves, self.leaf_size, 3).max(axis=1)
+
+        while leaves > 1:
+            half = leaves // 2
+            np.minimum(self.mins[leaves:2 * leaves:2], self.mins[leaves + 1:2 * leaves:2], out=self.mins[half:leaves])
+            np.maximum(self.maxs[leaves:2 * leaves:2], self.maxs[leaves + 1:2 * leaves:2], out=self.maxs[half:leaves])
+            leaves = half
+
+    def leaf_area(self):
+        sizes = np.maximum(self.maxs[self.leaves:] - self.mins[self.leaves:], 0)
+        return float((sizes[:, 0] * sizes[:, 1] + sizes[:, 1] * sizes[:, 2] + sizes[:, 2] * sizes[:, 0]).sum())
+
+    @property
+    def needs_rebuild(self):
+        return self.leaf_area() > self.built_area * REBUILD_GROWTH
+
+    def cull(self, planes):
+        # (first, count) item ranges of the leaves touching the frustum,
+        # adjacent leaves merged. Walks the tree a level at a time, nodes
+        # fully inside are accepted without testing their children.
+        if self.count == 0:
+            return []
+
+        visible = np.zeros(self.leaves, dtype=bool)
+        nodes = np.array([1])
+        normals, distances = planes[:, :3], planes[:, 3]
+        positive = normals > 0
+
+        for level in range(self.depth + 1):
+            mins, maxs = self.mins[nodes], self.maxs[nodes]
+
+            # Box corner furthest along / against each plane normal
+            far = np.where(positive, maxs[:, None, :], mins[:, None, :])
+            near = np.where(positive, mins[:, None, :], maxs[:, None, :])
+            outside = ((far * normals).sum(axis=2) + distances < 0).any(axis=1)
+            inside = ((near * normals).sum(axis=2) + distances >= 0).all(axis=1)
+
+            span = self.leaves >> level
+            for node in nodes[inside & ~outside]:
+                first = (node - (1 << level)) * span
+                visible[first:first + span] = True
+
+            nodes = nodes[~inside & ~outside]
+            if level == self.depth:
+                visible[nodes - self.leaves] = True
+            else:
+                nodes = np.stack([2 * nodes, 2 * nodes + 1], axis=1).reshape(-1)
+
+        # Runs of visible leaves as item ranges
+        edges = np.diff(np.concatenate(([0], visible.view(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1) * self.leaf_size
+        ends = np.minimum(np.flatnonzero(edges == -1) * self.leaf_size, self.count)
+        keep = starts < ends
+        ranges = list(zip(starts[keep].tolist(), (ends - starts)[keep].tolist()))
+
+        drawn = int((ends - starts)[keep].sum())
+        stats.objects_drawn += drawn
+        stats.objects_culled += self.count - drawn
+        return ranges
\ No newline at end of file
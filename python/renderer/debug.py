@@ -0,0 +1,69 @@
+import os
+import sys
+from OpenGL.GL import *
+
+# Debug mode: draws are validated and GL errors raise right where they
+# happen. Off in release runs, where none of it is even installed.
+DEBUG = bool(os.environ.get("OPENGL_TEST_DEBUG"))
+
+# KHR_debug messages of these types are errors, everything else is printed
+ERROR_TYPES = (GL_DEBUG_TYPE_ERROR, GL_DEBUG_TYPE_UNDEFINED_BEHAVIOR)
+
+
+class DebugOutput:
+    # Collects KHR_debug (GL 4.3) messages through a synchronous callback.
+    # The callback can't raise into the GL call, so errors are kept until
+    # check() raises them; other messages are printed once.
+
+    def __init__(self):
+        self.errors = []
+        self.seen = set()
+        self.supported = bool(glDebugMessageCallback)
+
+        if self.supported:
+            # Keep the ctypes callback alive for as long as GL may call it
+            self.callback = GLDEBUGPROC(self.message)
+            glEnable(GL_DEBUG_OUTPUT)
+            glEnable(GL_DEBUG_OUTPUT_SYNCHRONOUS)
+            glDebugMessageCallback(self.callback, None)
+
+    def message(self, source, type, id, severity, length, text, user):
+        text = text[:length].decode(errors="replace") if isinstance(text, bytes) else str(text)
+        if type in ERROR_TYPES:
+            self.errors.append(text)
+        elif severity != GL_DEBUG_SEVERITY_NOTIFICATION and text not in self.seen:
+            self.seen.add(text)
+            print(f"GL: {text}", file=sys.stderr)
+
+    def check(self, what):
+        # Raises the errors GL reported since the last check
+        error = glGetError()
+        if self.errors or error != GL_NO_ERROR:
+            messages = self.errors or [f"glGetError() = 0x{error:04x}"]
+            self.errors = []
+            raise RuntimeError(f"{what}: " + "; ".join(messages))
+
+    def delete(self):
+        if self.supported:
+            glDebugMessageCallback(GLDEBUGPROC(0), None)
+            glDisable(GL_DEBUG_OUTPUT)
+
+
+def validate_draw(mesh, first, count, instances, base_instance=0):
+    # Raises for draws that would read past the vertex or instance data of
+    # mesh. GL does not report those, they read garbage or crash the driver.
+    if first < 0 or count < 0:
+        raise RuntimeError(f"Draw of {count} elements from {first} has a negative range")
+
+    if mesh.ebo is not None:
+        if first + count > mesh.index_count:
+            raise RuntimeError(f"Draw of indices {first}..{first + count} is past the {mesh.index_count} indices of the mesh")
+        vertices_read = mesh.max_index + 1
+    else:
+        vertices_read = first + count
+
+    for location, (divisor, capacity) in mesh.attribute_limits.items():
+        if divisor == 0 and vertices_read > capacity:
+            raise RuntimeError(f"Draw reads {vertices_read} vertices, attribute {location} only has {capacity}")
+        if divisor and instances is not None and base_instance + -(-instances // divisor) > capacity:
+            raise RuntimeError(f"Draw of {instances} instances from {base_instance}, attribute {location} only has {capacity}")
\ No newline at end of file
@@ -0,0 +1,170 @@
+import numpy as np
+from .vertex_format import as_vertex_format
+
+# Post-transform cache entries assumed by the optimizer and the reports,
+# a conservative FIFO size for desktop GPUs
+CACHE_SIZE = 16
+
+# Largest vertex count that uint16 indices can address
+UINT16_VERTICES = 1 << 16
+
+
+def index_dtype(vertex_count):
+    return np.uint16 if vertex_count <= UINT16_VERTICES else np.uint32
+
+
+def weld(vertices, layout):
+    # Merges bit-identical vertices, given as interleaved floats of a float
+    # layout or as packed VertexFormat vertices. Returns the unique vertices
+    # (as a structured array of the format) in order of first use and
+    # indices into them.
+    vertices = as_vertex_format(layout).to_array(vertices)
+
+    rows = vertices.view(np.dtype((np.void, vertices.itemsize)))
+    _, first, inverse = np.unique(rows, return_index=True, return_inverse=True)
+
+    # np.unique sorts by bytes, renumber the vertices by first use instead
+    order = np.argsort(first)
+    remap = np.empty_like(order)
+    remap[order] = np.arange(len(order))
+    return vertices[first[order]], remap[inverse.ravel()]
+
+
+def optimize_vertex_cache(indices, vertex_count, cache_size=CACHE_SIZE):
+    # Reorders triangles for the post-transform vertex cache with Tipsify
+    # (Sander, Nehab, Barczak 2007): fan out from the current vertex and
+    # pick the next one among the recently used vertices that still have
+    # triangles left. Linear time, but a Python loop: meant for meshes that
+    # are built once, not per frame.
+    triangles = np.asarray(indices).reshape(-1, 3)
+    triangle_count = len(triangles)
+
+    # Triangles around each vertex as a CSR adjacency
+    corners = triangles.ravel()
+    order = np.argsort(corners, kind="stable")
+    adjacency = (order // 3).tolist()
+    starts = np.zeros(vertex_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(corners, minlength=vertex_count), out=starts[1:])
+    starts = starts.tolist()
+
+    live = np.diff(starts).tolist()
+    timestamps = [0] * vertex_count
+    emitted = [False] * triangle_count
+    triangle_list = triangles.tolist()
+
+    output = []
+    dead_end = []
+    time = cache_size + 1
+    cursor = 1
+    fanning = 0 if vertex_count else -1
+
+    while fanning >= 0:
+        candidates = []
+
+        for triangle in adjacency[starts[fanning]:starts[fanning + 1]]:
+            if emitted[triangle]:
+                continue
+            emitted[triangle] = True
+            output.append(triangle)
+
+            for vertex in triangle_list[triangle]:
+                dead_end.append(vertex)
+                candidates.append(vertex)
+                live[vertex] -= 1
+                if time - timestamps[vertex] > cache_size:
+                    timestamps[vertex] = time
+                    time += 1
+
+        # Next fanning vertex: the candidate that stays in the cache the
+        # longest after emitting its remaining triangles
+        fanning = -1
+        best = -1
+        for vertex in candidates:
+            if live[vertex]:
+                priority = 0
+                if time - timestamps[vertex] + 2 * live[vertex] <= cache_size:
+                    priority = time - timestamps[vertex]
+                if priority > best:
+                    best = priority
+                    fanning = vertex
+
+        if fanning < 0:
+            # Dead end: a recent vertex with triangles left, else the next
+            # unfinished vertex in input order
+            while dead_end:
+                vertex = dead_end.pop()
+                if live[vertex]:
+                    fanning = vertex
+                    break
+            else:
+                while cursor < vertex_count and not live[cursor]:
+                    cursor += 1
+                if cursor < vertex_count:
+                    fanning = cursor
+                elif vertex_count and live[0]:
+                    fanning = 0
+
+    return triangles[output].reshape(-1)
+
+
+def optimize_vertex_fetch(vertices, indices):
+    # Renumbers the vertices in order of first use by the indices, so the
+    # vertex fetches walk the buffer forward
+    order = np.unique(indices, return_index=True)[1]
+    used = np.asarray(indices)[np.sort(order)]
+    remap = np.empty(len(vertices), dtype=np.int64)
+    remap[used] = np.arange(len(used))
+    return vertices[used], remap[indices]
+
+
+def cache_miss_ratio(indices, cache_size=CACHE_SIZE):
+    # Vertex shader runs per triangle (ACMR) with a FIFO post-transform
+    # cache: 3.0 for triangle soup, about 0.5 at best for large grids
+    indices = np.asarray(indices).ravel()
+    cache = set()
+    fifo = []
+    misses = 0
+    for vertex in indices.tolist():
+        if vertex not in cache:
+            misses += 1
+            cache.add(vertex)
+            fifo.append(vertex)
+            if len(fifo) > cache_size:
+                cache.discard(fifo.pop(0))
+    return misses / max(len(indices) // 3, 1)
+
+
+class IndexedGeometry:
+    # Welded, optionally cache-optimized geometry ready for Mesh(vertices,
+    # layout, indices), with the savings over the triangle soup it came from
+
+    def __init__(self, vertices, layout, optimize=True, cache_size=CACHE_SIZE):
+        self.layout = layout
+        soup = as_vertex_format(layout).to_array(vertices)
+
+        vertices, indices = weld(soup, layout)
+        if optimize:
+            indices = optimize_vertex_cache(indices, len(vertices), cache_size)
+            vertices, indices = optimize_vertex_fetch(vertices, indices)
+
+        self.vertices = vertices
+        self.indices = indices.astype(index_dtype(len(vertices)))
+
+        self.soup_vertices = len(soup)
+        self.soup_bytes = soup.nbytes
+        self.cache_size = cache_size
+
+    @property
+    def nbytes(self):
+        return self.vertices.nbytes + self.indices.nbytes
+
+    def summary(self):
+        # Memory and vertex shader invocations against the triangle soup,
+        # which runs the vertex shader for every one of its vertices
+        triangles = len(self.indices) // 3
+        invocations = cache_miss_ratio(self.indices, self.cache_size) * triangles
+        return (f"{self.soup_vertices} -> {len(self.vertices)} vertices, "
+                f"{self.soup_bytes / 1024:.1f} -> {self.nbytes / 1024:.1f} KiB "
+                f"({self.indices.dtype.name} indices), "
+                f"vertex shader runs {self.soup_vertices} -> {invocations:.0f} "
+                f"(ACMR {invocations / max(triangles, 1):.2f})")
\ No newline at end of file
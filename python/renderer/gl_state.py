@@ -0,0 +1,110 @@
+import numpy as np
+from OpenGL.GL import *
+from .stats import stats
+
+
+class GLState:
+    # Shadow of the current program, VAO, buffer and texture bindings and
+    # enabled capabilities, so calls that would not change them are skipped
+    # (and counted in stats.calls_elided). It only stays right if every
+    # such call goes through it: reset() for a new context, and delete
+    # objects through it so their names can be reused. None means unknown,
+    # the next call always goes through.
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        # Defaults of a fresh context
+        self.program = 0
+        self.vertex_array = 0
+        self.buffers = {}
+        self.unit = 0
+        self.textures = {}
+        self.capabilities = {}
+
+    def use_program(self, program):
+        if program == self.program:
+            stats.calls_elided += 1
+            return
+        glUseProgram(program)
+        self.program = program
+        stats.state_changes += 1
+
+    def bind_vertex_array(self, vertex_array):
+        if vertex_array == self.vertex_array:
+            stats.calls_elided += 1
+            return
+        glBindVertexArray(vertex_array)
+        self.vertex_array = vertex_array
+        # The index buffer binding belongs to the VAO
+        self.buffers.pop(GL_ELEMENT_ARRAY_BUFFER, None)
+        stats.state_changes += 1
+
+    def bind_buffer(self, target, buffer):
+        if self.buffers.get(target) == buffer:
+            stats.calls_elided += 1
+            return
+        glBindBuffer(target, buffer)
+        self.buffers[target] = buffer
+
+    def bind_buffer_base(self, target, index, buffer):
+        # Indexed bindings are not shadowed, but this also binds target
+        glBindBufferBase(target, index, buffer)
+        self.buffers[target] = buffer
+
+    def bind_texture(self, target, texture, unit=None):
+        # On `unit`, or the active unit when None
+        if unit is not None and unit != self.unit:
+            glActiveTexture(GL_TEXTURE0 + unit)
+            self.unit = unit
+        if self.textures.get((self.unit, target)) == texture:
+            stats.calls_elided += 1
+            return
+        glBindTexture(target, texture)
+        self.textures[self.unit, target] = texture
+        stats.state_changes += 1
+
+    def enable(self, capability):
+        if self.capabilities.get(capability) is True:
+            stats.calls_elided += 1
+            return
+        glEnable(capability)
+        self.capabilities[capability] = True
+
+    def disable(self, capability):
+        if self.capabilities.get(capability) is False:
+            stats.calls_elided += 1
+            return
+        glDisable(capability)
+        self.capabilities[capability] = False
+
+    # Deleting a bound object unbinds it, and GL may hand its name out again.
+    # Names go to GL as uint32 arrays, lists would be copied per call.
+
+    def delete_program(self, program):
+        glDeleteProgram(program)
+        if program == self.program:
+            self.program = None
+
+    def delete_vertex_array(self, vertex_array):
+        glDeleteVertexArrays(1, np.array([vertex_array], dtype=np.uint32))
+        if vertex_array == self.vertex_array:
+            self.vertex_array = 0
+            self.buffers.pop(GL_ELEMENT_ARRAY_BUFFER, None)
+
+    def delete_buffers(self, buffers):
+        glDeleteBuffers(len(buffers), np.array(buffers, dtype=np.uint32))
+        for target, buffer in list(self.buffers.items()):
+            if buffer in buffers:
+                self.buffers[target] = 0
+
+    def delete_texture(self, texture):
+        glDeleteTextures(1, np.array([texture], dtype=np.uint32))
+        for key, bound in self.textures.items():
+            if bound == texture:
+                self.textures[key] = 0
+
+
+# Shared by every renderer class, there is one current context at a time
+gl_state = GLState()
\ No newline at end of file
@@ -0,0 +1,108 @@
+import ctypes
+import os
+import numpy as np
+import OpenGL.platform
+from OpenGL.GL import *
+from .debug import DEBUG
+
+
+class OffscreenTarget:
+    # GL 3.3 core context without any window: EGL on a surfaceless display
+    # (Mesa llvmpipe on machines without a GPU) rendering into an FBO.
+    # Input is never pressed and callbacks never fire.
+
+    def __init__(self, width, height):
+        if type(OpenGL.platform.PLATFORM).__name__ != "EGLPlatform":
+            raise RuntimeError("Headless rendering needs PyOpenGL on EGL: import renderer before OpenGL.GL or set PYOPENGL_PLATFORM=egl")
+
+        from OpenGL import EGL
+
+        # Mesa needs to be told there is no window system to talk to
+        os.environ.setdefault("EGL_PLATFORM", "surfaceless")
+
+        self.display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+        major, minor = EGL.EGLint(), EGL.EGLint()
+        if not EGL.eglInitialize(self.display, ctypes.pointer(major), ctypes.pointer(minor)):
+            raise RuntimeError("EGL can't be initialized!")
+
+        EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+
+        config = EGL.EGLConfig()
+        config_count = EGL.EGLint()
+        config_attributes = (EGL.EGLint * 5)(
+            EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+            EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+            EGL.EGL_NONE)
+        EGL.eglChooseConfig(self.display, config_attributes, ctypes.pointer(config), 1, ctypes.pointer(config_count))
+        if config_count.value == 0:
+            raise RuntimeError("No EGL config for desktop OpenGL!")
+
+        context_attributes = [
+            EGL.EGL_CONTEXT_MAJOR_VERSION, 3,
+            EGL.EGL_CONTEXT_MINOR_VERSION, 3,
+            EGL.EGL_CONTEXT_OPENGL_PROFILE_MASK, EGL.EGL_CONTEXT_OPENGL_CORE_PROFILE_BIT]
+        if DEBUG:
+            context_attributes += [EGL.EGL_CONTEXT_OPENGL_DEBUG, EGL.EGL_TRUE]
+        context_attributes = (EGL.EGLint * (len(context_attributes) + 1))(*context_attributes, EGL.EGL_NONE)
+        self.context = EGL.eglCreateContext(self.display, config, EGL.EGL_NO_CONTEXT, context_attributes)
+        if not self.context:
+            raise RuntimeError("EGL context can't be created!")
+
+        EGL.eglMakeCurrent(self.display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, self.context)
+        self.egl = EGL
+
+        self.width = width
+        self.height = height
+        self.title = ""
+
+        # Color + depth/stencil renderbuffers stand in for the window
+        self.framebuffer = glGenFramebuffers(1)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.framebuffer)
+
+        self.renderbuffers = glGenRenderbuffers(2)
+        glBindRenderbuffer(GL_RENDERBUFFER, self.renderbuffers[0])
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_RGBA8, width, height)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_RENDERBUFFER, self.renderbuffers[0])
+
+        glBindRenderbuffer(GL_RENDERBUFFER, self.renderbuffers[1])
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH24_STENCIL8, width, height)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_STENCIL_ATTACHMENT, GL_RENDERBUFFER, self.renderbuffers[1])
+        glBindRenderbuffer(GL_RENDERBUFFER, 0)
+
+        if glCheckFramebufferStatus(GL_FRAMEBUFFER) != GL_FRAMEBUFFER_COMPLETE:
+            raise RuntimeError("Offscreen framebuffer is incomplete!")
+
+    def framebuffer_size(self):
+        return self.width, self.height
+
+    def set_resize_callback(self, callback):
+        pass
+
+    def should_close(self):
+        return False
+
+    def poll_events(self):
+        pass
+
+    def swap_buffers(self):
+        # Nothing is presented, just hand the frame to the driver
+        glFlush()
+
+    def set_title(self, title):
+        self.title = title
+
+    def set_input(self, input):
+        # No events without a window, a replayed recording still works
+        pass
+
+    def capture_cursor(self):
+        pass
+
+    def close(self):
+        glDeleteFramebuffers(1, np.array([self.framebuffer], dtype=np.uint32))
+        glDeleteRenderbuffers(2, self.renderbuffers)
+
+        EGL = self.egl
+        EGL.eglMakeCurrent(self.display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, EGL.EGL_NO_CONTEXT)
+        EGL.eglDestroyContext(self.display, self.context)
+        EGL.eglTerminate(self.display)
\ No newline at end of file
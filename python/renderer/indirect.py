@@ -0,0 +1,84 @@
+import numpy as np
+from OpenGL.GL import *
+from .streaming import StreamingBuffer
+
+# DrawArraysIndirectCommand and DrawElementsIndirectCommand, laid out as GL
+# reads them from GL_DRAW_INDIRECT_BUFFER
+DRAW_ARRAYS_COMMAND = np.dtype([
+    ("count", np.uint32), ("instance_count", np.uint32), ("first", np.uint32), ("base_instance", np.uint32)])
+DRAW_ELEMENTS_COMMAND = np.dtype([
+    ("count", np.uint32), ("instance_count", np.uint32), ("first_index", np.uint32), ("base_vertex", np.int32),
+    ("base_instance", np.uint32)])
+
+
+def multi_draw_indirect_supported():
+    # glMultiDraw*Indirect with base instances: GL 4.3, or the extensions
+    if (glGetIntegerv(GL_MAJOR_VERSION), glGetIntegerv(GL_MINOR_VERSION)) >= (4, 3):
+        return True
+    extensions = {glGetStringi(GL_EXTENSIONS, index).decode() for index in range(glGetIntegerv(GL_NUM_EXTENSIONS))}
+    return {"GL_ARB_multi_draw_indirect", "GL_ARB_base_instance"} <= extensions
+
+
+class DrawCommands:
+    # Draws of one mesh that Renderer.multi_draw submits with one call,
+    # however many there are. With indirect drawing (indirect=None checks
+    # the context) set() writes DrawArrays/DrawElementsIndirectCommand
+    # records to a streamed GL_DRAW_INDIRECT_BUFFER for
+    # glMultiDraw*Indirect. Without it they become the first/count arrays
+    # of glMultiDrawArrays / glMultiDrawElements (GL 3.3), which can't
+    # draw instances.
+
+    def __init__(self, mesh, capacity=64, indirect=None):
+        self.mesh = mesh
+        self.indexed = mesh.ebo is not None
+        self.indirect = multi_draw_indirect_supported() if indirect is None else indirect
+        self.count = 0
+        # Byte offset of the latest commands in the indirect buffer
+        self.offset = 0
+        self.buffer = None
+        self.allocate(capacity)
+
+    def allocate(self, capacity):
+        self.capacity = capacity
+        self.commands = np.zeros(capacity, dtype=DRAW_ELEMENTS_COMMAND if self.indexed else DRAW_ARRAYS_COMMAND)
+
+        if self.indirect:
+            if self.buffer is not None:
+                self.buffer.delete()
+            self.buffer = StreamingBuffer(self.commands.nbytes, target=GL_DRAW_INDIRECT_BUFFER)
+        else:
+            # Contiguous and of the type GL takes, PyOpenGL copies nothing
+            self.firsts = np.zeros(capacity, dtype=np.int32)
+            self.counts = np.zeros(capacity, dtype=np.int32)
+            self.offsets = np.zeros(capacity, dtype=np.uintp)
+
+    def set(self, firsts, counts, instance_counts=1, base_instances=0):
+        # Replaces the commands with one per (first, count) vertex or index
+        # range, arguments are arrays or scalars for all. Call once per
+        # frame, before multi_draw.
+        count = np.broadcast(firsts, counts, instance_counts, base_instances).size
+        if count > self.capacity:
+            self.allocate(max(count, 2 * self.capacity))
+        self.count = count
+
+        commands = self.commands[:count]
+        commands["count"] = counts
+        commands["instance_count"] = instance_counts
+        commands["first_index" if self.indexed else "first"] = firsts
+        commands["base_instance"] = base_instances
+
+        if self.indirect:
+            self.offset = self.buffer.write(commands)
+            return
+
+        if np.any(commands["instance_count"] != 1) or np.any(commands["base_instance"]):
+            raise RuntimeError("Instanced draw commands need glMultiDrawArraysIndirect (GL 4.3)")
+        self.counts[:count] = counts
+        if self.indexed:
+            self.offsets[:count] = commands["first_index"] * self.mesh.index_size
+        else:
+            self.firsts[:count] = firsts
+
+    def delete(self):
+        if self.buffer is not None:
+            self.buffer.delete()
\ No newline at end of file
@@ -0,0 +1,104 @@
+import json
+import glfw
+
+# Event kinds, each with two arguments: key (code, pressed), cursor (x, y)
+# and scroll (x offset, y offset)
+KEY_EVENT = "key"
+CURSOR_EVENT = "cursor"
+SCROLL_EVENT = "scroll"
+
+
+def key_mask(*keys):
+    # Bits of the given key codes, to test against Input.keys
+    mask = 0
+    for key in keys:
+        mask |= 1 << key
+    return mask
+
+
+class InputRecording:
+    # Input events as (frame, kind, a, b), frames counted from 1 by
+    # Input.begin_frame(). Saved as JSON, one list per event.
+
+    def __init__(self, events=()):
+        self.events = [tuple(event) for event in events]
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump([list(event) for event in self.events], f)
+
+
+class Input:
+    # Keyboard and mouse state kept up to date by events rather than
+    # polled. Held keys are one int used as a bitset, bit n for key code n,
+    # so a check is a bit test instead of a glfw.get_key call. Events can
+    # be recorded, and a recording replayed in place of live input (which
+    # is then ignored), so a run can be driven without a human.
+
+    def __init__(self):
+        self.keys = 0
+        self.cursor_callback = None
+        self.scroll_callback = None
+
+        self.frame = 0
+        self.recording = None
+        self.replaying = None
+        self.replay_position = 0
+
+    def is_pressed(self, key):
+        return self.keys >> key & 1
+
+    def record(self):
+        self.recording = InputRecording()
+
+    def replay(self, recording):
+        self.replaying = sorted(recording.events, key=lambda event: event[0])
+        self.replay_position = 0
+
+    def begin_frame(self):
+        # Call once per frame before the window's events are polled
+        self.frame += 1
+        if self.replaying is None:
+            return
+
+        events = self.replaying
+        while self.replay_position < len(events) and events[self.replay_position][0] <= self.frame:
+            self.dispatch(*events[self.replay_position][1:])
+            self.replay_position += 1
+
+    # Live events from the window
+
+    def key_event(self, key, action):
+        if key >= 0 and action != glfw.REPEAT:
+            self.event(KEY_EVENT, key, int(action == glfw.PRESS))
+
+    def cursor_event(self, x, y):
+        self.event(CURSOR_EVENT, x, y)
+
+    def scroll_event(self, x, y):
+        self.event(SCROLL_EVENT, x, y)
+
+    def event(self, kind, a, b):
+        if self.replaying is not None:
+            return
+        if self.recording is not None:
+            self.recording.events.append((self.frame, kind, a, b))
+        self.dispatch(kind, a, b)
+
+    def dispatch(self, kind, a, b):
+        if kind == KEY_EVENT:
+            if b:
+                self.keys |= 1 << a
+            else:
+                self.keys &= ~(1 << a)
+        elif kind == CURSOR_EVENT:
+            if self.cursor_callback is not None:
+                self.cursor_callback(a, b)
+        elif kind == SCROLL_EVENT:
+            if self.scroll_callback is not None:
+                self.scroll_callback(a, b)
\ No newline at end of file
@@ -0,0 +1,121 @@
+import numpy as np
+from OpenGL.GL import *
+from .debug import DEBUG
+from .gl_state import gl_state
+from .stats import stats
+from .streaming import StreamingBuffer
+from .vertex_format import as_vertex_format
+
+
+class Mesh:
+    # A VAO over interleaved vertices, with optional uint16 or uint32 indices
+    # and extra (e.g. per-instance) attribute buffers. layout is a float32
+    # layout like (3, 3) or a VertexFormat for packed vertices. With
+    # usage=GL_STREAM_DRAW the vertices go through a StreamingBuffer and
+    # update() is cheap every frame.
+
+    def __init__(self, vertices, layout, indices=None, usage=GL_STATIC_DRAW, mode=GL_TRIANGLES):
+        self.format = as_vertex_format(layout)
+        vertices = self.format.to_array(vertices)
+
+        self.stride = self.format.stride
+        self.vertex_count = len(vertices)
+        self.mode = mode
+
+        # Binds are left in place, everything binds through gl_state
+        self.vao = glGenVertexArrays(1)
+        gl_state.bind_vertex_array(self.vao)
+
+        if usage == GL_STREAM_DRAW:
+            self.stream = StreamingBuffer(vertices.nbytes)
+            self.vbo = self.stream.buffer
+            gl_state.bind_buffer(GL_ARRAY_BUFFER, self.vbo)
+        else:
+            self.stream = None
+            self.vbo = glGenBuffers(1)
+            gl_state.bind_buffer(GL_ARRAY_BUFFER, self.vbo)
+            glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, usage)
+            stats.bytes_uploaded += vertices.nbytes
+
+        self.next_location = self.format.set_attributes(0)
+        self.buffers = []
+
+        # Attribute location -> (divisor, elements in its buffer), only kept
+        # in debug mode for the draw validator
+        self.attribute_limits = {}
+        if DEBUG:
+            for location in range(self.next_location):
+                self.attribute_limits[location] = (0, self.vertex_count)
+
+        if indices is not None:
+            indices = np.ascontiguousarray(indices)
+            if indices.dtype != np.uint16:
+                indices = indices.astype(np.uint32)
+            self.index_type = GL_UNSIGNED_SHORT if indices.dtype == np.uint16 else GL_UNSIGNED_INT
+            self.index_size = indices.itemsize
+            self.index_count = indices.size
+            self.max_index = int(indices.max(initial=0)) if DEBUG else None
+            self.ebo = glGenBuffers(1)
+            gl_state.bind_buffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo)
+            glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_STATIC_DRAW)
+            stats.bytes_uploaded += indices.nbytes
+            self.buffers.append(self.ebo)
+        else:
+            self.index_count = 0
+            self.ebo = None
+
+        if self.stream is not None:
+            self.update(vertices)
+
+    def add_buffer(self, data, layout, divisor=0, usage=GL_STATIC_DRAW):
+        # New attribute buffer after the existing attributes, returns its id
+        data = as_vertex_format(layout).to_array(data)
+        buffer = glGenBuffers(1)
+        gl_state.bind_buffer(GL_ARRAY_BUFFER, buffer)
+        glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, usage)
+        stats.bytes_uploaded += data.nbytes
+
+        self.buffers.append(buffer)
+        self.attach_buffer(buffer, layout, self.next_location, divisor, capacity=len(data))
+        return buffer
+
+    def attach_buffer(self, buffer, layout, location, divisor=0, stride=None, offset=0, capacity=None):
+        # Points attributes at a buffer owned elsewhere, can be re-pointed.
+        # capacity is the element count from offset on, debug mode asks GL
+        # for the buffer size when it is not given.
+        layout = as_vertex_format(layout)
+        gl_state.bind_vertex_array(self.vao)
+        gl_state.bind_buffer(GL_ARRAY_BUFFER, buffer)
+        end = layout.set_attributes(location, divisor, stride, offset)
+
+        if DEBUG:
+            if capacity is None:
+                size = glGetBufferParameteriv(GL_ARRAY_BUFFER, GL_BUFFER_SIZE)
+                capacity = (size - offset) // (stride or layout.stride)
+            for attribute in range(location, end):
+                self.attribute_limits[attribute] = (divisor, capacity)
+
+        stats.state_changes += 1
+
+        self.next_location = max(self.next_location, end)
+
+    def update(self, vertices, buffer=None):
+        # Replaces the vertex data (or the data of an added buffer)
+        if buffer is None and self.stream is not None:
+            # Point the vertex attributes at the ring region just written,
+            # buffers added with add_buffer() keep their own offsets
+            self.attach_buffer(self.vbo, self.format, 0, offset=self.stream.write(vertices), capacity=self.vertex_count)
+            return
+
+        gl_state.bind_buffer(GL_ARRAY_BUFFER, self.vbo if buffer is None else buffer)
+        glBufferSubData(GL_ARRAY_BUFFER, 0, vertices.nbytes, vertices)
+        stats.bytes_uploaded += vertices.nbytes
+
+    def delete(self):
+        gl_state.delete_vertex_array(self.vao)
+        if self.stream is not None:
+            self.stream.delete()
+        else:
+            gl_state.delete_buffers([self.vbo])
+        if self.buffers:
+            gl_state.delete_buffers(self.buffers)
\ No newline at end of file
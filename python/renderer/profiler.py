@@ -0,0 +1,168 @@
+import ctypes
+import time
+import numpy as np
+from OpenGL.GL import *
+from .stats import COUNTERS, stats
+
+# Main loop phases timed by App, scenes add "upload" around their uploads
+PHASES = ("input", "simulate", "upload", "draw", "swap")
+
+# Timer queries in flight. A query is read back this many frames after it
+# was issued, by then it is finished and reading it never stalls.
+QUERY_FRAMES = 3
+
+COLUMNS = ("frame", "cpu_ms") + tuple(f"{phase}_ms" for phase in PHASES) + ("gpu_ms",) + COUNTERS
+
+
+class _Phase:
+    # Reusable context manager for one phase name
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler.push(self.name)
+
+    def __exit__(self, *exc):
+        self.profiler.pop()
+
+
+class _NullPhase:
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        pass
+
+
+class Profiler:
+    # Per-frame CPU time of each phase, GPU time from GL_TIME_ELAPSED queries
+    # and the renderer stats counters, kept for the last `history` frames.
+    # Phase times are exclusive: time in a nested phase (e.g. upload inside
+    # draw) is not counted again in the outer one. A disabled profiler costs
+    # one attribute check per phase.
+
+    def __init__(self, history=600, enabled=True):
+        self.enabled = enabled
+        self.history = history
+
+        self.records = np.full((history, len(COLUMNS)), np.nan)
+        self.frame = 0
+
+        self.phases = {name: _Phase(self, name) for name in PHASES}
+        self.null_phase = _NullPhase()
+        self.times = dict.fromkeys(PHASES, 0.0)
+        self.stack = []
+        self.mark = 0.0
+
+        self.queries = glGenQueries(QUERY_FRAMES) if enabled else []
+        # Frame each query is timing, None when free
+        self.query_frames = [None] * QUERY_FRAMES
+        self.active_query = None
+
+    def phase(self, name):
+        if not self.enabled:
+            return self.null_phase
+        return self.phases[name]
+
+    def push(self, name):
+        now = time.perf_counter()
+        if self.stack:
+            self.times[self.stack[-1]] += now - self.mark
+        self.stack.append(name)
+        self.mark = now
+
+    def pop(self):
+        now = time.perf_counter()
+        self.times[self.stack.pop()] += now - self.mark
+        self.mark = now
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+
+        self.collect()
+        for name in PHASES:
+            self.times[name] = 0.0
+        self.counters = stats.snapshot()
+
+        # The first timer query in a context can measure from context
+        # creation (llvmpipe does), so the first frame is not GPU timed
+        slot = self.frame % QUERY_FRAMES
+        if self.frame > 0 and self.query_frames[slot] is None:
+            glBeginQuery(GL_TIME_ELAPSED, self.queries[slot])
+            self.query_frames[slot] = self.frame
+            self.active_query = slot
+
+        self.start = time.perf_counter()
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+
+        cpu = time.perf_counter() - self.start
+
+        if self.active_query is not None:
+            glEndQuery(GL_TIME_ELAPSED)
+            self.active_query = None
+
+        record = self.records[self.frame % self.history]
+        record[:] = (self.frame, cpu * 1000.0, *(self.times[name] * 1000.0 for name in PHASES),
+                     np.nan, *np.subtract(stats.snapshot(), self.counters))
+        self.frame += 1
+
+    def collect(self):
+        # Stores the GPU time of finished queries, skips the unfinished ones
+        result = ctypes.c_uint64()
+        for slot, frame in enumerate(self.query_frames):
+            if frame is None:
+                continue
+            if not glGetQueryObjectiv(self.queries[slot], GL_QUERY_RESULT_AVAILABLE):
+                continue
+
+            glGetQueryObjectui64v(self.queries[slot], GL_QUERY_RESULT, ctypes.byref(result))
+            self.query_frames[slot] = None
+
+            # Only if the record has not been overwritten in the meantime
+            if self.frame - frame < self.history:
+                self.records[frame % self.history, COLUMNS.index("gpu_ms")] = result.value / 1e6
+
+    def latest(self, frames=None):
+        # Records of the last `frames` frames (all kept ones by default), oldest first
+        count = min(self.frame, self.history)
+        if frames is not None:
+            count = min(count, frames)
+        indices = np.arange(self.frame - count, self.frame) % self.history
+        return self.records[indices]
+
+    def summary(self, frames=None):
+        # One line: mean ms per phase, CPU/GPU p95 and the average counters
+        records = self.latest(frames)
+        if not len(records):
+            return "no frames"
+
+        column = {name: records[:, index] for index, name in enumerate(COLUMNS)}
+        gpu = column["gpu_ms"][~np.isnan(column["gpu_ms"])]
+        phases = " ".join(f"{name} {column[f'{name}_ms'].mean():.2f}" for name in PHASES)
+        gpu_text = f"{gpu.mean():.2f} ms (p95 {np.percentile(gpu, 95):.2f})" if len(gpu) else "n/a"
+
+        text = (f"cpu {column['cpu_ms'].mean():.2f} ms (p95 {np.percentile(column['cpu_ms'], 95):.2f}) "
+                f"[{phases}] gpu {gpu_text} "
+                f"draws {column['draw_calls'].mean():.0f} states {column['state_changes'].mean():.0f} "
+                f"(elided {column['calls_elided'].mean():.0f}) "
+                f"upload {column['bytes_uploaded'].mean() / 1024:.1f} KiB")
+
+        drawn, culled = column["objects_drawn"].mean(), column["objects_culled"].mean()
+        if drawn or culled:
+            text += f" objects {drawn:.0f}/{drawn + culled:.0f}"
+        return text
+
+    def to_csv(self, path):
+        # GPU times of the last few frames may still be empty
+        self.collect()
+        np.savetxt(path, self.latest(), delimiter=",", header=",".join(COLUMNS), comments="", fmt="%.6g")
+
+    def delete(self):
+        if len(self.queries):
+            glDeleteQueries(QUERY_FRAMES, self.queries)
\ No newline at end of file
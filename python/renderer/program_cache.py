@@ -0,0 +1,106 @@
+import ctypes
+import hashlib
+import os
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.error import GLError
+
+# Where linked program binaries are kept between runs
+CACHE_DIRECTORY = os.environ.get("OPENGL_TEST_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "opengl-test", "programs"))
+
+
+class ProgramCache:
+    # On-disk cache of linked program binaries (glGetProgramBinary /
+    # glProgramBinary). Entries are keyed by the shader sources plus the
+    # driver vendor/renderer/version, so a driver update starts cold.
+
+    def __init__(self, directory=CACHE_DIRECTORY):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        # Binaries found on disk but refused by the driver
+        self.rejected = 0
+        # Binary formats the driver accepts, filled on first load
+        self.formats = None
+
+    def supported(self):
+        return bool(glProgramBinary) and glGetIntegerv(GL_NUM_PROGRAM_BINARY_FORMATS) > 0
+
+    def binary_formats(self):
+        if self.formats is None:
+            formats = np.zeros(max(glGetIntegerv(GL_NUM_PROGRAM_BINARY_FORMATS), 1), dtype=np.int32)
+            glGetIntegerv(GL_PROGRAM_BINARY_FORMATS, formats)
+            self.formats = set(formats.tolist())
+        return self.formats
+
+    def key(self, *sources):
+        digest = hashlib.sha256()
+        for part in sources + (glGetString(GL_VENDOR), glGetString(GL_RENDERER), glGetString(GL_VERSION)):
+            if isinstance(part, str):
+                part = part.encode()
+            digest.update(part or b"")
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ".bin")
+
+    def load(self, program, key):
+        # True if the program was linked from a cached binary
+        try:
+            with open(self.path(key), "rb") as f:
+                data = f.read()
+        except OSError:
+            self.misses += 1
+            return False
+
+        # Empty, truncated or foreign entries never reach the driver, which
+        # raises for them (or leaves an error pending without checking)
+        binary_format = int.from_bytes(data[:4], "little")
+        binary = data[4:]
+        accepted = len(data) > 4 and binary_format in self.binary_formats()
+        if accepted:
+            try:
+                glProgramBinary(program, binary_format, binary, len(binary))
+            except GLError:
+                accepted = False
+            if glGetError() != GL_NO_ERROR:
+                accepted = False
+
+        if not accepted or glGetProgramiv(program, GL_LINK_STATUS) != GL_TRUE:
+            self.rejected += 1
+            self.misses += 1
+            return False
+
+        self.hits += 1
+        return True
+
+    def store(self, program, key):
+        length = glGetProgramiv(program, GL_PROGRAM_BINARY_LENGTH)
+        if length <= 0:
+            return
+
+        binary = (ctypes.c_ubyte * length)()
+        written = GLsizei()
+        binary_format = GLenum()
+        glGetProgramBinary(program, length, ctypes.byref(written), ctypes.byref(binary_format), binary)
+
+        # Write then rename, so a crash never leaves a truncated entry. A
+        # directory that can't be written just leaves programs uncached.
+        temporary = self.path(key) + f".{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temporary, "wb") as f:
+                f.write(binary_format.value.to_bytes(4, "little"))
+                f.write(bytes(binary)[:written.value])
+            os.replace(temporary, self.path(key))
+        except OSError:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+    def summary(self):
+        return f"program cache: {self.hits} hits, {self.misses} misses ({self.rejected} rejected)"
+
+
+# Used by every ShaderProgram unless it is given another cache (or None)
+default_cache = ProgramCache()
\ No newline at end of file
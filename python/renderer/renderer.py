@@ -0,0 +1,106 @@
+import ctypes
+from OpenGL.GL import *
+from .debug import DEBUG, DebugOutput, validate_draw
+from .gl_state import gl_state
+from .stats import stats
+from .uniform_buffer import UniformBuffer, BLOCK_BINDINGS, CAMERA_BLOCK_SIZE
+
+
+class Renderer:
+    # Single place where draws are submitted, so every scene shares the
+    # same bookkeeping
+
+    def __init__(self):
+        # Shared Camera uniform block, created on first use, and the camera
+        # version it holds
+        self.camera_block = None
+        self.camera_uploaded = None
+
+        # Debug mode swaps in the validating draw, release draws pay nothing
+        self.debug = None
+        if DEBUG:
+            self.debug = DebugOutput()
+            self.draw = self.validated_draw
+            self.multi_draw = self.validated_multi_draw
+
+    def clear(self, r, g, b, a=1.0, depth=False):
+        glClearColor(r, g, b, a)
+        if depth:
+            glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        else:
+            glClear(GL_COLOR_BUFFER_BIT)
+
+    def set_camera(self, camera):
+        # One upload for every program declaring the Camera block, none
+        # while the camera has not changed
+        if self.camera_block is None:
+            self.camera_block = UniformBuffer(CAMERA_BLOCK_SIZE, BLOCK_BINDINGS["Camera"])
+        if self.camera_uploaded != (camera, camera.version):
+            self.camera_block.update(camera.buffer)
+            self.camera_uploaded = (camera, camera.version)
+
+    def draw(self, mesh, first=0, count=None, instances=None):
+        # Draws count vertices (or indices) of mesh starting at first, the
+        # whole mesh by default; instances > 0 makes it an instanced draw
+        gl_state.bind_vertex_array(mesh.vao)
+
+        if mesh.ebo is not None:
+            if count is None:
+                count = mesh.index_count - first
+            offset = ctypes.c_void_p(first * mesh.index_size)
+            if instances is None:
+                glDrawElements(mesh.mode, count, mesh.index_type, offset)
+            else:
+                glDrawElementsInstanced(mesh.mode, count, mesh.index_type, offset, instances)
+        else:
+            if count is None:
+                count = mesh.vertex_count - first
+            if instances is None:
+                glDrawArrays(mesh.mode, first, count)
+            else:
+                glDrawArraysInstanced(mesh.mode, first, count, instances)
+
+        stats.draw_calls += 1
+
+    def multi_draw(self, commands):
+        # Every command of a DrawCommands (set this frame) in one call
+        if commands.count == 0:
+            return
+        mesh = commands.mesh
+        gl_state.bind_vertex_array(mesh.vao)
+
+        if commands.indirect:
+            gl_state.bind_buffer(GL_DRAW_INDIRECT_BUFFER, commands.buffer.buffer)
+            offset = ctypes.c_void_p(commands.offset)
+            if commands.indexed:
+                glMultiDrawElementsIndirect(mesh.mode, mesh.index_type, offset, commands.count, 0)
+            else:
+                glMultiDrawArraysIndirect(mesh.mode, offset, commands.count, 0)
+        elif commands.indexed:
+            glMultiDrawElements(mesh.mode, commands.counts, mesh.index_type, commands.offsets, commands.count)
+        else:
+            glMultiDrawArrays(mesh.mode, commands.firsts, commands.counts, commands.count)
+
+        stats.draw_calls += 1
+
+    def validated_draw(self, mesh, first=0, count=None, instances=None):
+        # draw() that raises for out-of-range draws and for GL errors
+        if count is None:
+            count = (mesh.index_count if mesh.ebo is not None else mesh.vertex_count) - first
+        validate_draw(mesh, first, count, instances)
+        Renderer.draw(self, mesh, first, count, instances)
+        self.debug.check("draw")
+
+    def validated_multi_draw(self, commands):
+        first_field = "first_index" if commands.indexed else "first"
+        for command in commands.commands[:commands.count]:
+            validate_draw(commands.mesh, int(command[first_field]), int(command["count"]),
+                          int(command["instance_count"]), int(command["base_instance"]))
+        Renderer.multi_draw(self, commands)
+        self.debug.check("multi_draw")
+
+    def delete(self):
+        if self.debug is not None:
+            self.debug.delete()
+        if self.camera_block is not None:
+            self.camera_block.delete()
\ No newline at end of file
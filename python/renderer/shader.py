@@ -0,0 +1,108 @@
+import ctypes
+import glm
+import numpy as np
+from OpenGL.GL import *
+from .gl_state import gl_state
+from .program_cache import default_cache
+from .stats import stats
+from .uniform_buffer import BLOCK_BINDINGS
+
+
+def compile_shader(source, shader_type):
+    shader = glCreateShader(shader_type)
+    glShaderSource(shader, source)
+    glCompileShader(shader)
+    if glGetShaderiv(shader, GL_COMPILE_STATUS) != GL_TRUE:
+        raise RuntimeError(glGetShaderInfoLog(shader))
+    return shader
+
+
+class ShaderProgram:
+    # Linked vertex + fragment program. The fragment shader may be left out
+    # for transform feedback programs, which pass their output `varyings`.
+    # Uniform locations are looked up once here, never in the render loop.
+    # Linked binaries go through `cache` (a ProgramCache, None to disable).
+
+    def __init__(self, vertex_source, fragment_source=None, varyings=None, cache=default_cache):
+        self.program = glCreateProgram()
+
+        if cache is not None and cache.supported():
+            key = cache.key(vertex_source, fragment_source or "", " ".join(varyings or []))
+            if not cache.load(self.program, key):
+                # Start from a fresh program, a rejected binary leaves it unusable
+                glDeleteProgram(self.program)
+                self.program = glCreateProgram()
+                glProgramParameteri(self.program, GL_PROGRAM_BINARY_RETRIEVABLE_HINT, GL_TRUE)
+                self.link(vertex_source, fragment_source, varyings)
+                cache.store(self.program, key)
+        else:
+            self.link(vertex_source, fragment_source, varyings)
+
+        self.uniforms = {}
+        for index in range(glGetProgramiv(self.program, GL_ACTIVE_UNIFORMS)):
+            name = glGetActiveUniform(self.program, index)[0]
+            location = glGetUniformLocation(self.program, name)
+            # Uniforms inside a block have no location
+            if location >= 0:
+                self.uniforms[name.decode().removesuffix("[0]")] = location
+
+        for name, binding in BLOCK_BINDINGS.items():
+            block_index = glGetUniformBlockIndex(self.program, name.encode())
+            if block_index != GL_INVALID_INDEX:
+                glUniformBlockBinding(self.program, block_index, binding)
+
+    def link(self, vertex_source, fragment_source, varyings):
+        shaders = [compile_shader(vertex_source, GL_VERTEX_SHADER)]
+        if fragment_source is not None:
+            shaders.append(compile_shader(fragment_source, GL_FRAGMENT_SHADER))
+
+        for shader in shaders:
+            glAttachShader(self.program, shader)
+
+        if varyings:
+            names = (ctypes.c_char_p * len(varyings))(*[name.encode() for name in varyings])
+            glTransformFeedbackVaryings(self.program, len(varyings), ctypes.cast(names, ctypes.POINTER(ctypes.POINTER(GLchar))), GL_INTERLEAVED_ATTRIBS)
+
+        glLinkProgram(self.program)
+
+        if glGetProgramiv(self.program, GL_LINK_STATUS) != GL_TRUE:
+            raise RuntimeError(glGetProgramInfoLog(self.program))
+
+        for shader in shaders:
+            glDetachShader(self.program, shader)
+            glDeleteShader(shader)
+
+    def use(self):
+        gl_state.use_program(self.program)
+
+    def uniform_location(self, name):
+        # -1 for unknown or optimized-out names, which GL silently ignores
+        return self.uniforms.get(name, -1)
+
+    # The setters below act on the program in use
+
+    def set_mat4(self, name, matrix):
+        self.set_mat4_at(self.uniform_location(name), matrix)
+
+    def set_mat4_at(self, location, matrix):
+        # For hot loops that looked the location up once. matrix is a glm
+        # mat4 or a column-major float32 array, passed as is
+        if not isinstance(matrix, np.ndarray):
+            matrix = glm.value_ptr(matrix)
+        glUniformMatrix4fv(location, 1, GL_FALSE, matrix)
+        stats.state_changes += 1
+
+    def set_vec3(self, name, value):
+        glUniform3f(self.uniform_location(name), *value)
+        stats.state_changes += 1
+
+    def set_float(self, name, value):
+        glUniform1f(self.uniform_location(name), value)
+        stats.state_changes += 1
+
+    def set_int(self, name, value):
+        glUniform1i(self.uniform_location(name), value)
+        stats.state_changes += 1
+
+    def delete(self):
+        gl_state.delete_program(self.program)
\ No newline at end of file
@@ -0,0 +1,161 @@
+import glm
+import numpy as np
+from OpenGL.GL import *
+from .geometry import index_dtype
+from .mesh import Mesh
+from .shader import ShaderProgram
+from .vertex_format import VertexFormat
+
+# Sprites per upload; 4 vertices each keeps the indices 16-bit
+SPRITE_CAPACITY = 16384
+
+# Float positions, normalized texture coordinates, the array layer as float
+SPRITE_FORMAT = VertexFormat((2, np.float32), (2, np.uint16, True), (1, np.uint16))
+
+# Corners are (x0, y0), (x1, y0), (x0, y1), (x1, y1)
+QUAD_INDICES = [0, 1, 2, 2, 1, 3]
+
+VERTEX_SHADER_SOURCE = """
+#version 330 core
+layout(location = 0) in vec2 aPos;
+layout(location = 1) in vec2 aTexCoord;
+layout(location = 2) in float aLayer;
+
+uniform mat4 projection;
+
+out vec2 TexCoord;
+flat out float Layer;
+
+void main()
+{
+    gl_Position = projection * vec4(aPos, 0.0, 1.0);
+    TexCoord = aTexCoord;
+    Layer = aLayer;
+}
+"""
+
+# One fragment shader per texture target
+FRAGMENT_SHADER_SOURCES = {
+    GL_TEXTURE_2D: """
+#version 330 core
+out vec4 FragColor;
+in vec2 TexCoord;
+flat in float Layer;
+
+uniform sampler2D sprites;
+
+void main()
+{
+    FragColor = texture(sprites, TexCoord);
+}
+""",
+    GL_TEXTURE_2D_ARRAY: """
+#version 330 core
+out vec4 FragColor;
+in vec2 TexCoord;
+flat in float Layer;
+
+uniform sampler2DArray sprites;
+
+void main()
+{
+    FragColor = texture(sprites, vec3(TexCoord, Layer));
+}
+""",
+}
+
+
+class SpriteBatch:
+    # Collects textured quads between begin() and end(), then uploads them
+    # in one streaming write and draws each run of sprites sharing a
+    # texture with one call. With a TextureAtlas or TextureArray holding
+    # every image that is a single draw for the whole batch.
+
+    def __init__(self, capacity=SPRITE_CAPACITY):
+        self.capacity = capacity
+        self.vertices = np.zeros(capacity * 4, dtype=SPRITE_FORMAT.dtype)
+
+        indices = np.arange(capacity)[:, None] * 4 + QUAD_INDICES
+        self.mesh = Mesh(self.vertices, SPRITE_FORMAT, indices.astype(index_dtype(capacity * 4)), usage=GL_STREAM_DRAW)
+
+        # Texture target -> program, built on first use
+        self.programs = {}
+
+        self.renderer = None
+        self.projection = glm.mat4()
+        self.count = 0
+        # [texture, first sprite, sprite count] in draw order
+        self.runs = []
+
+    def begin(self, renderer, projection=None):
+        # projection maps sprite coordinates to clip space, identity by default
+        self.renderer = renderer
+        self.projection = glm.mat4() if projection is None else projection
+
+    def add(self, texture, rectangles, images=0):
+        # rectangles are (x, y, width, height) rows, images index the
+        # texture's uvs and layers (a single index for all of them is fine)
+        rectangles = np.asarray(rectangles, dtype=np.float32).reshape(-1, 4)
+        images = np.broadcast_to(images, len(rectangles))
+
+        start = 0
+        while start < len(rectangles):
+            if self.count == self.capacity:
+                self.flush()
+            end = start + min(len(rectangles) - start, self.capacity - self.count)
+            self.write(texture, rectangles[start:end], images[start:end])
+            start = end
+
+    def write(self, texture, rectangles, images):
+        count = len(rectangles)
+        x0, y0 = rectangles[:, 0], rectangles[:, 1]
+        x1, y1 = x0 + rectangles[:, 2], y0 + rectangles[:, 3]
+        positions = np.stack([x0, y0, x1, y0, x0, y1, x1, y1], axis=1)
+
+        uvs = texture.uvs[images]
+        u0, v0, u1, v1 = uvs[:, 0], uvs[:, 1], uvs[:, 2], uvs[:, 3]
+        coordinates = np.stack([u0, v0, u1, v0, u0, v1, u1, v1], axis=1)
+
+        layers = np.repeat(texture.layers[images], 4)
+
+        first = self.count
+        SPRITE_FORMAT.pack(positions, coordinates, layers, out=self.vertices[first * 4:(first + count) * 4])
+        self.count += count
+
+        if self.runs and self.runs[-1][0] is texture:
+            self.runs[-1][2] += count
+        else:
+            self.runs.append([texture, first, count])
+
+    def flush(self):
+        # Draws what has been added so far, end() calls it
+        if self.count == 0:
+            return
+
+        self.mesh.update(self.vertices[:self.count * 4])
+
+        program = None
+        for texture, first, count in self.runs:
+            if program is not self.program(texture.target):
+                program = self.program(texture.target)
+                program.use()
+                program.set_mat4("projection", self.projection)
+            texture.bind()
+            self.renderer.draw(self.mesh, first * 6, count * 6)
+
+        self.count = 0
+        self.runs = []
+
+    def end(self):
+        self.flush()
+        self.renderer = None
+
+    def program(self, target):
+        if target not in self.programs:
+            self.programs[target] = ShaderProgram(VERTEX_SHADER_SOURCE, FRAGMENT_SHADER_SOURCES[target])
+        return self.programs[target]
+
+    def delete(self):
+        self.mesh.delete()
+        for program in self.programs.values():
+            program.delete()
\ No newline at end of file
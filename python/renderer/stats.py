@@ -0,0 +1,25 @@
+# Counter names, in snapshot() order
+COUNTERS = ("draw_calls", "state_changes", "calls_elided", "bytes_uploaded", "objects_drawn", "objects_culled")
+
+
+class FrameStats:
+    # Work counters bumped by the renderer classes as they submit it. They
+    # only ever grow: take the difference around a frame to see its cost.
+
+    def __init__(self):
+        self.draw_calls = 0
+        # Program, VAO and texture binds, uniform sets and attribute re-points
+        self.state_changes = 0
+        # Binds and enables GLState skipped because nothing would change
+        self.calls_elided = 0
+        self.bytes_uploaded = 0
+        # Objects a culling pass kept or dropped
+        self.objects_drawn = 0
+        self.objects_culled = 0
+
+    def snapshot(self):
+        return tuple(getattr(self, name) for name in COUNTERS)
+
+
+# Shared by every Renderer, Mesh and buffer in the process
+stats = FrameStats()
\ No newline at end of file
@@ -0,0 +1,70 @@
+import ctypes
+import numpy as np
+from OpenGL.GL import *
+from .gl_state import gl_state
+from .stats import stats
+
+
+class StreamingBuffer:
+    # Vertex buffer that is rewritten every frame without stalling on the GPU.
+    # With glBufferStorage (GL 4.4 / ARB_buffer_storage) it is a persistently
+    # mapped ring of `frames` regions, each guarded by a fence. Otherwise it
+    # falls back to orphaning: glBufferData(None) then glBufferSubData.
+
+    def __init__(self, size, frames=3, target=GL_ARRAY_BUFFER):
+        self.size = size
+        self.frames = frames
+        self.target = target
+        self.persistent = bool(glBufferStorage) and bool(glFenceSync)
+
+        self.buffer = glGenBuffers(1)
+        gl_state.bind_buffer(target, self.buffer)
+
+        if self.persistent:
+            flags = GL_MAP_WRITE_BIT | GL_MAP_PERSISTENT_BIT | GL_MAP_COHERENT_BIT
+            glBufferStorage(target, size * frames, None, flags)
+            pointer = glMapBufferRange(target, 0, size * frames, flags)
+            self.mapped = np.ctypeslib.as_array((ctypes.c_ubyte * (size * frames)).from_address(pointer))
+            self.fences = [None] * frames
+        else:
+            glBufferData(target, size, None, GL_STREAM_DRAW)
+
+        # Ring region handed out by the latest write, -1 before the first one
+        self.frame = -1
+
+    def write(self, data):
+        # Copies data into the next region and returns its byte offset. Call
+        # once per frame, before the draws that read it: the draws reading
+        # the previous region have all been issued by then, so it is fenced.
+        stats.bytes_uploaded += data.nbytes
+
+        if not self.persistent:
+            gl_state.bind_buffer(self.target, self.buffer)
+            glBufferData(self.target, self.size, None, GL_STREAM_DRAW)
+            glBufferSubData(self.target, 0, data.nbytes, data)
+            return 0
+
+        if self.frame >= 0:
+            self.fences[self.frame] = glFenceSync(GL_SYNC_GPU_COMMANDS_COMPLETE, 0)
+        self.frame = (self.frame + 1) % self.frames
+
+        fence = self.fences[self.frame]
+        if fence is not None:
+            # Only blocks if the GPU is still reading this region frames later
+            while glClientWaitSync(fence, GL_SYNC_FLUSH_COMMANDS_BIT, 1_000_000_000) == GL_TIMEOUT_EXPIRED:
+                pass
+            glDeleteSync(fence)
+            self.fences[self.frame] = None
+
+        offset = self.frame * self.size
+        self.mapped[offset:offset + data.nbytes] = data.reshape(-1).view(np.uint8)
+        return offset
+
+    def delete(self):
+        if self.persistent:
+            for fence in self.fences:
+                if fence is not None:
+                    glDeleteSync(fence)
+            gl_state.bind_buffer(self.target, self.buffer)
+            glUnmapBuffer(self.target)
+        gl_state.delete_buffers([self.buffer])
\ No newline at end of file
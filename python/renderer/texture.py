@@ -0,0 +1,58 @@
+import ctypes
+import numpy as np
+from OpenGL.GL import *
+from .gl_state import gl_state
+from .stats import stats
+from .texture_cache import default_texture_cache, load_image
+
+
+class Texture:
+    # 2D RGBA8 texture, repeat wrap + nearest filtering. Texture(path) loads
+    # an image file right away (through `cache`, a TextureCache or None);
+    # without a path it stays empty until upload(), which is how
+    # TextureManager hands out textures that are still loading.
+
+    target = GL_TEXTURE_2D
+
+    # Sprite regions (u0, v0, u1, v1) and array layers by image index, see
+    # SpriteBatch. A plain texture is one image covering all of it.
+    uvs = np.array([[0.0, 0.0, 1.0, 1.0]], dtype=np.float32)
+    layers = np.zeros(1, dtype=np.uint16)
+
+    def __init__(self, path=None, cache=default_texture_cache):
+        self.texture = glGenTextures(1)
+        gl_state.bind_texture(self.target, self.texture)
+
+        glTexParameteri(self.target, GL_TEXTURE_WRAP_S, GL_REPEAT)
+        glTexParameteri(self.target, GL_TEXTURE_WRAP_T, GL_REPEAT)
+        glTexParameteri(self.target, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        glTexParameteri(self.target, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+
+        self.width = 0
+        self.height = 0
+        self.ready = False
+
+        if path is not None:
+            self.upload(load_image(path, cache))
+
+    def upload(self, levels, offsets=None):
+        # levels is the whole mip chain, (height, width, 4) uint8 arrays with
+        # the largest first. With offsets the pixels are read from the bound
+        # GL_PIXEL_UNPACK_BUFFER at those byte offsets instead.
+        gl_state.bind_texture(GL_TEXTURE_2D, self.texture)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAX_LEVEL, len(levels) - 1)
+
+        for level, pixels in enumerate(levels):
+            height, width = pixels.shape[:2]
+            data = pixels if offsets is None else ctypes.c_void_p(offsets[level])
+            glTexImage2D(GL_TEXTURE_2D, level, GL_RGBA8, width, height, 0, GL_RGBA, GL_UNSIGNED_BYTE, data)
+            stats.bytes_uploaded += pixels.nbytes
+
+        self.height, self.width = levels[0].shape[:2]
+        self.ready = True
+
+    def bind(self, unit=0):
+        gl_state.bind_texture(self.target, self.texture, unit)
+
+    def delete(self):
+        gl_state.delete_texture(self.texture)
\ No newline at end of file
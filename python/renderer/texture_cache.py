@@ -0,0 +1,148 @@
+import hashlib
+import io
+import os
+import numpy as np
+from PIL import Image
+
+# Where decoded, mipmapped textures are kept between runs
+TEXTURE_CACHE_DIRECTORY = os.environ.get("OPENGL_TEST_TEXTURE_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "opengl-test", "textures"))
+
+# Part of every key, bump it when the entry layout changes
+FORMAT_VERSION = b"rgba8-mips-1"
+
+MAGIC = b"TEX1"
+# Magic, width, height, then the levels; padded so level 0 starts 16-aligned
+HEADER_SIZE = 16
+
+
+def mip_sizes(width, height):
+    # (width, height) of every level down to 1x1, the way GL halves them
+    sizes = [(width, height)]
+    while width > 1 or height > 1:
+        width, height = max(width // 2, 1), max(height // 2, 1)
+        sizes.append((width, height))
+    return sizes
+
+
+def mip_levels(data, width, height):
+    # Views of a flat uint8 buffer holding a whole mip chain
+    levels = []
+    offset = 0
+    for level_width, level_height in mip_sizes(width, height):
+        size = level_width * level_height * 4
+        levels.append(data[offset:offset + size].reshape(level_height, level_width, 4))
+        offset += size
+    return levels
+
+
+def downsample(pixels, width, height):
+    # 2x2 box filter to (height, width); an odd last row or column is
+    # dropped, a side that is already 1 is kept
+    total = pixels.astype(np.uint16)
+    if total.shape[0] > 1:
+        total = total[0:height * 2:2] + total[1:height * 2:2]
+    else:
+        total = total * 2
+    if total.shape[1] > 1:
+        total = total[:, 0:width * 2:2] + total[:, 1:width * 2:2]
+    else:
+        total = total * 2
+    return ((total + 2) >> 2).astype(np.uint8)
+
+
+def decode_image(file):
+    # Header + mip chain of an image file as one flat uint8 array, rows
+    # bottom-up as glTexImage2D expects. The flip is written straight into
+    # the chain, the only copy after PIL's RGBA conversion.
+    with Image.open(file) as image:
+        pixels = np.asarray(image.convert("RGBA"))
+
+    height, width = pixels.shape[:2]
+    sizes = mip_sizes(width, height)
+    data = np.empty(HEADER_SIZE + sum(w * h * 4 for w, h in sizes), dtype=np.uint8)
+    data[:HEADER_SIZE] = 0
+    data[:4] = np.frombuffer(MAGIC, dtype=np.uint8)
+    data[4:12].view("<u4")[:] = width, height
+
+    levels = mip_levels(data[HEADER_SIZE:], width, height)
+    levels[0][:] = pixels[::-1]
+    for level in range(1, len(levels)):
+        level_width, level_height = sizes[level]
+        levels[level][:] = downsample(levels[level - 1], level_width, level_height)
+    return data
+
+
+def read_levels(data):
+    # Mip chain of a decode_image buffer (or a mapped cache entry)
+    if bytes(data[:4]) != MAGIC:
+        raise RuntimeError("Not a cached texture")
+    width, height = (int(value) for value in data[4:12].view("<u4"))
+    return mip_levels(data[HEADER_SIZE:], width, height)
+
+
+class TextureCache:
+    # On-disk cache of decoded, mipmapped RGBA8 textures keyed by the hash
+    # of the image file, so a warm start maps the mip chain from disk
+    # (np.memmap) instead of decoding it. Safe to use from several threads.
+
+    def __init__(self, directory=TEXTURE_CACHE_DIRECTORY):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, data):
+        digest = hashlib.sha256(FORMAT_VERSION)
+        digest.update(data)
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ".tex")
+
+    def load(self, path):
+        # Mip chain of an image file, largest level first
+        with open(path, "rb") as f:
+            data = f.read()
+        key = self.key(data)
+
+        try:
+            entry = np.memmap(self.path(key), dtype=np.uint8, mode="r")
+            levels = read_levels(entry)
+        except (OSError, ValueError, RuntimeError):
+            # Missing, empty or foreign entries are rebuilt
+            pass
+        else:
+            self.hits += 1
+            return levels
+
+        self.misses += 1
+        entry = decode_image(io.BytesIO(data))
+        self.store(key, entry)
+        return read_levels(entry)
+
+    def store(self, key, entry):
+        # Write then rename, so a crash never leaves a truncated entry. A
+        # directory that can't be written just leaves textures uncached.
+        temporary = self.path(key) + f".{os.getpid()}.{id(entry)}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            entry.tofile(temporary)
+            os.replace(temporary, self.path(key))
+        except OSError:
+            # Or another load stored it first and has it mapped
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+    def summary(self):
+        return f"texture cache: {self.hits} hits, {self.misses} misses"
+
+
+# Used by every Texture and TextureManager unless given another cache (or None)
+default_texture_cache = TextureCache()
+
+
+def load_image(path, cache=default_texture_cache):
+    # Mip chain of an image file, through `cache` when there is one
+    if cache is None:
+        with open(path, "rb") as f:
+            return read_levels(decode_image(f))
+    return cache.load(path)
\ No newline at end of file
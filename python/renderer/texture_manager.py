@@ -0,0 +1,76 @@
+import ctypes
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from OpenGL.GL import *
+from .gl_state import gl_state
+from .texture import Texture
+from .texture_cache import default_texture_cache, load_image
+
+
+class TextureManager:
+    # Loads textures off the main thread. load() hands back an empty Texture
+    # at once and decodes the file (or maps it from the TextureCache) on a
+    # thread pool, so many loads overlap each other and the frames drawn
+    # meanwhile. update() uploads the finished ones from the GL thread
+    # through a pixel-unpack buffer; check texture.ready before drawing.
+
+    def __init__(self, workers=None, cache=default_texture_cache):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="texture")
+        self.cache = cache
+        # (texture, future) for every load not uploaded yet
+        self.pending = []
+        self.upload_buffer = glGenBuffers(1)
+
+    def load(self, path):
+        texture = Texture()
+        self.pending.append((texture, self.pool.submit(load_image, path, self.cache)))
+        return texture
+
+    def update(self):
+        # Uploads the loads that have finished, returns how many are left
+        waiting = []
+        for texture, future in self.pending:
+            if future.done():
+                self.upload(texture, future.result())
+            else:
+                waiting.append((texture, future))
+        self.pending = waiting
+        return len(waiting)
+
+    def finish(self):
+        # Blocks until every load so far is uploaded
+        for texture, future in self.pending:
+            self.upload(texture, future.result())
+        self.pending = []
+
+    def upload(self, texture, levels):
+        size = sum(level.nbytes for level in levels)
+
+        # Orphan the previous contents, the copy never waits for the GPU to
+        # finish reading them
+        gl_state.bind_buffer(GL_PIXEL_UNPACK_BUFFER, self.upload_buffer)
+        glBufferData(GL_PIXEL_UNPACK_BUFFER, size, None, GL_STREAM_DRAW)
+        pointer = glMapBufferRange(GL_PIXEL_UNPACK_BUFFER, 0, size, GL_MAP_WRITE_BIT | GL_MAP_INVALIDATE_BUFFER_BIT)
+        mapped = np.ctypeslib.as_array((ctypes.c_ubyte * size).from_address(pointer))
+
+        offsets = []
+        offset = 0
+        for level in levels:
+            mapped[offset:offset + level.nbytes] = level.reshape(-1)
+            offsets.append(offset)
+            offset += level.nbytes
+        glUnmapBuffer(GL_PIXEL_UNPACK_BUFFER)
+
+        # Unbound again: other uploads read client memory
+        texture.upload(levels, offsets)
+        gl_state.bind_buffer(GL_PIXEL_UNPACK_BUFFER, 0)
+
+    def summary(self):
+        if self.cache is None:
+            return "texture cache: disabled"
+        return self.cache.summary()
+
+    def delete(self):
+        self.pool.shutdown(cancel_futures=True)
+        self.pending = []
+        gl_state.delete_buffers([self.upload_buffer])
\ No newline at end of file
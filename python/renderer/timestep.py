@@ -0,0 +1,46 @@
+import os
+import numpy as np
+
+# Simulation ticks per second, whatever the frame rate
+TICK_RATE = int(os.environ.get("OPENGL_TEST_TICK_RATE", "60"))
+
+# Ticks run at most in one frame; after a longer stall the rest of the time
+# is dropped rather than making the next frame slower still
+MAX_TICKS_PER_FRAME = 8
+
+
+class FixedTimestep:
+    # Turns variable frame times into a whole number of fixed ticks. Time is
+    # kept in integer nanoseconds, so the same frame times always give the
+    # same ticks. alpha is how far the current time is past the last tick,
+    # as a fraction of one: scenes draw previous + (latest - previous) * alpha.
+
+    def __init__(self, rate=TICK_RATE, max_ticks=MAX_TICKS_PER_FRAME):
+        self.rate = rate
+        self.step_ns = round(1e9 / rate)
+        self.step = self.step_ns / 1e9
+        self.max_ticks = max_ticks
+
+        # Time not yet simulated, always less than one tick after advance()
+        self.accumulator_ns = 0
+        self.ticks = 0
+
+    def advance(self, delta_time):
+        # Adds a frame's time, returns how many ticks to run for it
+        self.accumulator_ns = min(self.accumulator_ns + round(delta_time * 1e9), self.max_ticks * self.step_ns)
+        ticks = self.accumulator_ns // self.step_ns
+        self.accumulator_ns -= ticks * self.step_ns
+        self.ticks += ticks
+        return ticks
+
+    @property
+    def alpha(self):
+        return self.accumulator_ns / self.step_ns
+
+
+def interpolate(previous, latest, alpha, out):
+    # previous + (latest - previous) * alpha, written to out
+    np.subtract(latest, previous, out=out)
+    out *= alpha
+    out += previous
+    return out
\ No newline at end of file
@@ -0,0 +1,35 @@
+from OpenGL.GL import *
+from .gl_state import gl_state
+from .stats import stats
+
+# Binding points of the uniform blocks shared by every program, a program
+# that declares one of these blocks is bound to it when it is linked
+BLOCK_BINDINGS = {
+    "Camera": 0,
+}
+
+# std140 layout of the Camera block: mat4 projection, mat4 view
+CAMERA_BLOCK_SIZE = 2 * 64
+
+
+class UniformBuffer:
+    # Buffer behind a uniform block. It stays bound to its binding point,
+    # so one update is seen by every program using the block.
+
+    def __init__(self, size, binding):
+        self.size = size
+        self.binding = binding
+
+        self.buffer = glGenBuffers(1)
+        gl_state.bind_buffer_base(GL_UNIFORM_BUFFER, binding, self.buffer)
+        glBufferData(GL_UNIFORM_BUFFER, size, None, GL_DYNAMIC_DRAW)
+
+    def update(self, data, offset=0):
+        # data is bytes or a contiguous array
+        size = memoryview(data).nbytes
+        gl_state.bind_buffer(GL_UNIFORM_BUFFER, self.buffer)
+        glBufferSubData(GL_UNIFORM_BUFFER, offset, size, data)
+        stats.bytes_uploaded += size
+
+    def delete(self):
+        gl_state.delete_buffers([self.buffer])
\ No newline at end of file
@@ -0,0 +1,111 @@
+import ctypes
+import numpy as np
+from OpenGL.GL import *
+
+# Attribute component types GL can fetch and convert to float
+GL_TYPES = {
+    np.dtype(np.float32): GL_FLOAT,
+    np.dtype(np.float16): GL_HALF_FLOAT,
+    np.dtype(np.int8): GL_BYTE,
+    np.dtype(np.uint8): GL_UNSIGNED_BYTE,
+    np.dtype(np.int16): GL_SHORT,
+    np.dtype(np.uint16): GL_UNSIGNED_SHORT,
+}
+
+
+class VertexFormat:
+    # Interleaved vertex layout, one (components, dtype, normalized) tuple
+    # per attribute, e.g. VertexFormat((3, np.float16), (3, np.uint8, True))
+    # for half-float positions and normalized byte colors in 12 bytes. Every
+    # attribute starts 4-byte aligned. Vertices are numpy structured arrays
+    # of `dtype`, pack() builds them from float data.
+
+    def __init__(self, *attributes):
+        self.attributes = []
+        self.offsets = []
+
+        offset = 0
+        for attribute in attributes:
+            size, dtype, normalized = (tuple(attribute) + (False,))[:3]
+            dtype = np.dtype(dtype)
+            if dtype not in GL_TYPES:
+                raise ValueError(f"Unsupported vertex attribute type {dtype}")
+
+            self.attributes.append((size, dtype, normalized))
+            self.offsets.append(offset)
+            offset += -(-size * dtype.itemsize // 4) * 4
+
+        self.stride = offset
+        self.names = [f"a{index}" for index in range(len(self.attributes))]
+        self.dtype = np.dtype({
+            "names": self.names,
+            "formats": [(dtype, (size,)) for size, dtype, _ in self.attributes],
+            "offsets": self.offsets,
+            "itemsize": self.stride,
+        })
+
+        # Plain float32 data converts by reinterpreting it, no packing
+        self.floats_only = all(dtype == np.float32 for _, dtype, _ in self.attributes)
+
+    @classmethod
+    def floats(cls, layout):
+        # The float32 layout Mesh takes as a tuple of component counts
+        return cls(*((size, np.float32) for size in layout))
+
+    def __eq__(self, other):
+        return isinstance(other, VertexFormat) and self.dtype == other.dtype
+
+    def __hash__(self):
+        return hash(self.dtype)
+
+    def pack(self, *arrays, out=None):
+        # Vertices from one float array per attribute, quantizing normalized
+        # integer attributes: [0, 1] to the unsigned and [-1, 1] to the
+        # signed range
+        arrays = [np.asarray(data).reshape(-1, size) for data, (size, _, _) in zip(arrays, self.attributes)]
+        if out is None:
+            out = np.zeros(len(arrays[0]), dtype=self.dtype)
+
+        for name, data, (size, dtype, normalized) in zip(self.names, arrays, self.attributes):
+            if normalized and dtype.kind in "iu":
+                info = np.iinfo(dtype)
+                data = np.rint(np.clip(data, -1.0 if dtype.kind == "i" else 0.0, 1.0) * info.max)
+            elif dtype.kind in "iu":
+                data = np.rint(data)
+            out[name] = data
+
+        return out
+
+    def to_array(self, vertices):
+        # Vertices as a structured array of this format: as is if they
+        # already are one, reinterpreted if they are interleaved floats
+        if vertices.dtype == self.dtype:
+            return np.ascontiguousarray(vertices).reshape(-1)
+        if not self.floats_only:
+            raise ValueError("Vertices for a packed format have to be built with VertexFormat.pack()")
+        components = sum(size for size, _, _ in self.attributes)
+        floats = np.ascontiguousarray(vertices, dtype=np.float32).reshape(-1, components)
+        return floats.view(self.dtype).reshape(-1)
+
+    def set_attributes(self, location, divisor=0, stride=None, offset=0):
+        # Points consecutive attribute locations at the bound GL_ARRAY_BUFFER,
+        # returns the next free location
+        if stride is None:
+            stride = self.stride
+
+        for (size, dtype, normalized), attribute_offset in zip(self.attributes, self.offsets):
+            glVertexAttribPointer(location, size, GL_TYPES[dtype], GL_TRUE if normalized else GL_FALSE,
+                                  stride, ctypes.c_void_p(offset + attribute_offset))
+            glEnableVertexAttribArray(location)
+            if divisor:
+                glVertexAttribDivisor(location, divisor)
+            location += 1
+
+        return location
+
+
+def as_vertex_format(layout):
+    # Accepts a VertexFormat or a tuple of float32 component counts
+    if isinstance(layout, VertexFormat):
+        return layout
+    return VertexFormat.floats(layout)
\ No newline at end of file
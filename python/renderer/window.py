@@ -0,0 +1,51 @@
+import glfw
+from .debug import DEBUG
+
+
+class WindowTarget:
+    # GLFW window with its GL context current
+
+    def __init__(self, width, height, title, vsync=False):
+        if not glfw.init():
+            raise Exception("GLFW can't be initialized!")
+
+        if DEBUG:
+            glfw.window_hint(glfw.OPENGL_DEBUG_CONTEXT, glfw.TRUE)
+
+        self.window = glfw.create_window(width, height, title, None, None)
+        if not self.window:
+            glfw.terminate()
+            raise Exception("GLFW window can't be created!")
+
+        glfw.make_context_current(self.window)
+        glfw.swap_interval(1 if vsync else 0)
+
+    def framebuffer_size(self):
+        return glfw.get_framebuffer_size(self.window)
+
+    def set_resize_callback(self, callback):
+        glfw.set_framebuffer_size_callback(self.window, lambda window, width, height: callback(width, height))
+
+    def should_close(self):
+        return glfw.window_should_close(self.window)
+
+    def poll_events(self):
+        glfw.poll_events()
+
+    def swap_buffers(self):
+        glfw.swap_buffers(self.window)
+
+    def set_title(self, title):
+        glfw.set_window_title(self.window, title)
+
+    def set_input(self, input):
+        # Feeds the window's key, cursor and scroll events to an Input
+        glfw.set_key_callback(self.window, lambda window, key, scancode, action, mods: input.key_event(key, action))
+        glfw.set_cursor_pos_callback(self.window, lambda window, xpos, ypos: input.cursor_event(xpos, ypos))
+        glfw.set_scroll_callback(self.window, lambda window, xoffset, yoffset: input.scroll_event(xoffset, yoffset))
+
+    def capture_cursor(self):
+        glfw.set_input_mode(self.window, glfw.CURSOR, glfw.CURSOR_DISABLED)
+
+    def close(self):
+        glfw.terminate()
\ No newline at end of file